@@ -2,21 +2,127 @@
 """
 Newsletter Generator Module (v2 with Template Support)
 Formats extracted knowledge into enterprise-ready newsletter formats using Microsoft-style templates
+
+Performance note: Numba is not applicable here - this module is string/IO
+bound (f-strings, dict walks, file writes), not numeric, and Numba supports
+neither str.format nor f-strings. Hot paths rely on C-level str methods,
+memoized section builders and streamed writes instead.
 """
 
+import io
 import os
+import re
 import json
+import functools
+import dataclasses
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 from pathlib import Path
-from typing import Dict, List
+from typing import Dict, Iterable, List, Optional, Union
 from dataclasses import dataclass
 
 from rag_engine import ExtractedKnowledge
 
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
+
+# Single-pass HTML escaping for LLM-derived text via the C-level str.translate
+_HTML_ESCAPE_TABLE = str.maketrans({
+    '&': '&amp;',
+    '<': '&lt;',
+    '>': '&gt;',
+    '"': '&quot;',
+    "'": '&#39;',
+})
+
+
+def _esc(value) -> str:
+    """Escape a value for safe interpolation into HTML text or attributes"""
+    return str(value).translate(_HTML_ESCAPE_TABLE)
+
+
+@functools.lru_cache(maxsize=4096)
+def _esc_cached(text: str) -> str:
+    """Escape a string, memoized since tech tags and practice names repeat across runs"""
+    return text.translate(_HTML_ESCAPE_TABLE)
+
+
+def _escape_tree(value):
+    """Return a copy of a JSON-like structure with every string HTML-escaped"""
+    if isinstance(value, str):
+        return _esc_cached(value)
+    if isinstance(value, dict):
+        return {key: _escape_tree(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return type(value)(_escape_tree(item) for item in value)
+    return value
+
+
+def _normalize_highlight(highlight) -> Dict[str, str]:
+    """Coerce a highlight to a dict with 'title' and 'description' keys ('' title for plain text)"""
+    if isinstance(highlight, dict):
+        return {
+            'title': highlight.get('title', 'Highlight'),
+            'description': highlight.get('description', ''),
+        }
+    return {'title': '', 'description': str(highlight)}
+
+
+def _memoize_section(builder):
+    """
+    Cache a pure section builder on the JSON encoding of its input
+    
+    Regenerating a newsletter from the same knowledge (e.g. with a different
+    title) then reuses the rendered HTML instead of rebuilding every section.
+    Inputs that cannot be JSON-encoded are rendered without caching.
+    """
+    @functools.lru_cache(maxsize=256)
+    def cached(frozen: str) -> str:
+        return builder(json.loads(frozen))
+    
+    @functools.wraps(builder)
+    def wrapper(data):
+        try:
+            frozen = json.dumps(data, sort_keys=True)
+        except (TypeError, ValueError):
+            return builder(data)
+        return cached(frozen)
+    
+    wrapper.cache_info = cached.cache_info
+    wrapper.cache_clear = cached.cache_clear
+    return wrapper
+
 
 class NewsletterGenerator:
     """Generate enterprise-grade technology newsletters with Microsoft-style templates"""
     
+    # Output files are streamed through a large buffer instead of being joined in memory first
+    WRITE_BUFFER_SIZE = 256 * 1024
+    
+    # Feature article sections and action item audiences, in rendering order
+    ARTICLE_SECTIONS = (
+        ('context', 'Context / Problem Statement'),
+        ('key_ideas', 'Key Ideas or Architecture'),
+        ('benefits', 'Benefits & Trade-offs'),
+        ('best_practices', 'Recommended Best Practices'),
+    )
+    ACTION_ITEM_AUDIENCES = (
+        ('engineering_teams', 'For Engineering Teams'),
+        ('architecture_teams', 'For Architecture / Strategy Teams'),
+        ('leadership', 'For Leadership / Decision Makers'),
+    )
+    
+    # {{KEY}} placeholders the renderer fills; any others are left in place
+    TEMPLATE_PLACEHOLDERS = frozenset({
+        'TITLE', 'SUBTITLE', 'DATE', 'EXECUTIVE_SUMMARY', 'METRICS_DASHBOARD',
+        'STRATEGIC_INSIGHTS', 'KEY_HIGHLIGHTS', 'FEATURE_ARTICLES', 'QUICK_BITES',
+        'ACTION_ITEMS', 'DIAGRAMS', 'TECHNOLOGIES', 'BEST_PRACTICES', 'FOOTER_DATE',
+    })
+    
     def __init__(self, output_dir: str = "./output", template_dir: str = None):
         self.output_dir = Path(output_dir)
         self.output_dir.mkdir(exist_ok=True, parents=True)
@@ -28,15 +134,38 @@ class NewsletterGenerator:
             # Default to templates folder in project root
             self.template_dir = Path(__file__).parent.parent / "templates"
         
-        # Load template
+        # Locate template (read lazily on first HTML render)
         self.template_path = self.template_dir / "microsoft_newsletter_template.html"
         if self.template_path.exists():
-            with open(self.template_path, 'r', encoding='utf-8') as f:
-                self.html_template = f.read()
-            print(f"  ✓ Loaded Microsoft template: {self.template_path.name}")
+            print(f"  ✓ Using Microsoft template: {self.template_path.name}")
         else:
             print(f"  ⚠ Template not found: {self.template_path}")
-            self.html_template = None
+        
+        self._placeholder_re = re.compile(r'\{\{([A-Z_]+)\}\}')
+    
+    @functools.cached_property
+    def html_template(self) -> Optional[str]:
+        """Template text, read on first use so Markdown/JSON-only callers never load it"""
+        if not self.template_path.exists():
+            return None
+        with open(self.template_path, 'r', encoding='utf-8') as f:
+            return f.read()
+    
+    @functools.cached_property
+    def _template_tokens(self) -> List[str]:
+        """
+        Template pre-split into [literal, KEY, literal, KEY, ..., literal]
+        so rendering is a single walk with no scanning of the template text
+        """
+        if not self.html_template:
+            return []
+        tokens = self._placeholder_re.split(self.html_template)
+        
+        unknown = set(tokens[1::2]) - self.TEMPLATE_PLACEHOLDERS
+        if unknown:
+            print(f"  ⚠ Unknown template placeholders left as-is: {', '.join(sorted(unknown))}")
+        
+        return tokens
     
     def generate_newsletter(self, knowledge: ExtractedKnowledge, 
                           title: str = "Technology Newsletter",
@@ -54,22 +183,45 @@ class NewsletterGenerator:
         Returns:
             Dictionary with paths to generated files
         """
-        timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+        # Read the clock once so all three outputs carry the same timestamp
+        now = datetime.now()
+        timestamp = now.strftime('%Y%m%d_%H%M%S')
+        date_str = now.strftime('%B %d, %Y')
+        footer_str = now.strftime('%B %d, %Y at %I:%M %p')
+        iso_str = now.isoformat()
+        
+        md_path = self.output_dir / f"newsletter_{timestamp}.md"
+        html_path = self.output_dir / f"newsletter_{timestamp}.html"
+        json_path = self.output_dir / f"newsletter_{timestamp}.json"
         
         print("\n📝 Generating Newsletter Outputs")
         print("-" * 70)
         
-        # Generate Markdown
-        md_path = self._generate_markdown(knowledge, title, subtitle, timestamp, diagrams)
-        print(f"  ✓ Markdown: {md_path.name}")
-        
-        # Generate HTML (with template and diagrams)
-        html_path = self._generate_html_from_template(knowledge, title, subtitle, timestamp, diagrams)
-        print(f"  ✓ HTML (Microsoft Template + Diagrams): {html_path.name}")
-        
-        # Generate JSON
-        json_path = self._generate_json(knowledge, title, subtitle, timestamp, diagrams)
-        print(f"  ✓ JSON: {json_path.name}")
+        # Resolve the knowledge structure once for both the Markdown and HTML renderers
+        sections = self._normalize_knowledge(knowledge)
+        
+        # The three writers only read their inputs, so build and write them concurrently
+        with ThreadPoolExecutor(max_workers=3) as executor:
+            md_future = executor.submit(
+                self._generate_markdown,
+                knowledge, sections, title, subtitle, md_path, date_str, diagrams
+            )
+            html_future = executor.submit(
+                self._generate_html_from_template,
+                knowledge, sections, title, subtitle, html_path, date_str, footer_str, diagrams
+            )
+            json_future = executor.submit(
+                self._generate_json, knowledge, title, subtitle, json_path, iso_str, diagrams
+            )
+            
+            md_future.result()
+            print(f"  ✓ Markdown: {md_path.name}")
+            
+            html_future.result()
+            print(f"  ✓ HTML (Microsoft Template + Diagrams): {html_path.name}")
+            
+            json_future.result()
+            print(f"  ✓ JSON: {json_path.name}")
         
         return {
             'markdown': str(md_path),
@@ -77,55 +229,111 @@ class NewsletterGenerator:
             'json': str(json_path),
             'title': title,
             'subtitle': subtitle,
-            'generated_at': datetime.now().isoformat()
+            'generated_at': iso_str
+        }
+    
+    def _normalize_knowledge(self, knowledge: ExtractedKnowledge) -> Dict:
+        """
+        Normalize extracted knowledge into the shape shared by all renderers
+        
+        Resolves the dict-vs-string and missing-field cases once, so the
+        Markdown and HTML renderers iterate plain, uniform structures.
+        
+        Returns:
+            Dictionary of section name to normalized content
+        """
+        highlights = [_normalize_highlight(h) for h in knowledge.key_highlights]
+        
+        articles = [
+            {
+                'title': a.get('title'),
+                'sections': [(label, a[key]) for key, label in self.ARTICLE_SECTIONS if a.get(key)],
+                'call_to_action': a.get('call_to_action'),
+            }
+            for a in knowledge.feature_articles if isinstance(a, dict)
+        ]
+        
+        action_items = []
+        if isinstance(knowledge.action_items, dict):
+            action_items = [
+                (label, knowledge.action_items[key])
+                for key, label in self.ACTION_ITEM_AUDIENCES
+                if knowledge.action_items.get(key)
+            ]
+        
+        return {
+            'key_highlights': highlights,
+            'feature_articles': articles,
+            'quick_bites': knowledge.quick_bites or [],
+            'action_items': action_items,
+            'technologies': knowledge.technologies or [],
+            'best_practices': knowledge.best_practices or [],
         }
     
-    def _generate_html_from_template(self, knowledge: ExtractedKnowledge, 
-                                     title: str, subtitle: str, timestamp: str, 
+    def _generate_html_from_template(self, knowledge: ExtractedKnowledge, sections: Dict,
+                                     title: str, subtitle: str, html_path: Path,
+                                     date_str: str, footer_str: str,
                                      diagrams: List = None) -> Path:  # NEW: diagrams param
         """Generate HTML newsletter using Microsoft template with embedded diagrams"""
         
         if not self.html_template:
             # Fallback to inline generation if template not found
-            return self._generate_html_inline(knowledge, title, subtitle, timestamp)
+            return self._generate_html_inline(knowledge, title, subtitle, html_path, date_str)
+        
+        # Escape all LLM-derived text in one pass; the builders below concatenate it as-is
+        knowledge = self._escape_knowledge(knowledge)
+        sections = _escape_tree(sections)
         
         # Build components
         executive_summary_html = self._build_executive_summary(knowledge.executive_summary)
         metrics_dashboard_html = self._build_metrics_dashboard(knowledge)  # NEW
-        strategic_insights_html = self._build_strategic_insights_section(
-            knowledge.strategic_insights if hasattr(knowledge, 'strategic_insights') else {}
-        )  # NEW
-        key_highlights_html = self._build_key_highlights(knowledge.key_highlights)
-        feature_articles_html = self._build_feature_articles(knowledge.feature_articles)
-        quick_bites_html = self._build_quick_bites(knowledge.quick_bites)
-        action_items_html = self._build_action_items(knowledge.action_items)
-        technologies_html = self._build_technologies(knowledge.technologies)
-        best_practices_html = self._build_best_practices(knowledge.best_practices)
+        strategic_insights_html = self._build_strategic_insights_section(knowledge.strategic_insights)  # NEW
+        key_highlights_html = self._build_key_highlights(sections['key_highlights'])
+        feature_articles_html = self._build_feature_articles(sections['feature_articles'])
+        quick_bites_html = self._build_quick_bites(sections['quick_bites'])
+        action_items_html = self._build_action_items(sections['action_items'])
+        technologies_html = self._build_technologies(sections['technologies'])
+        best_practices_html = self._build_best_practices(sections['best_practices'])
         diagrams_html = self._build_diagrams_section(diagrams)  # NEW
         
-        # Replace placeholders in template
-        html_content = self.html_template
-        html_content = html_content.replace('{{TITLE}}', title)
-        html_content = html_content.replace('{{SUBTITLE}}', subtitle)
-        html_content = html_content.replace('{{DATE}}', datetime.now().strftime('%B %d, %Y'))
-        html_content = html_content.replace('{{EXECUTIVE_SUMMARY}}', executive_summary_html)
-        html_content = html_content.replace('{{METRICS_DASHBOARD}}', metrics_dashboard_html)  # NEW
-        html_content = html_content.replace('{{STRATEGIC_INSIGHTS}}', strategic_insights_html)  # NEW
-        html_content = html_content.replace('{{KEY_HIGHLIGHTS}}', key_highlights_html)
-        html_content = html_content.replace('{{FEATURE_ARTICLES}}', feature_articles_html)
-        html_content = html_content.replace('{{QUICK_BITES}}', quick_bites_html)
-        html_content = html_content.replace('{{ACTION_ITEMS}}', action_items_html)
-        html_content = html_content.replace('{{DIAGRAMS}}', diagrams_html)  # NEW
-        html_content = html_content.replace('{{TECHNOLOGIES}}', technologies_html)
-        html_content = html_content.replace('{{BEST_PRACTICES}}', best_practices_html)
-        html_content = html_content.replace('{{FOOTER_DATE}}', datetime.now().strftime('%B %d, %Y at %I:%M %p'))
-        
-        # Write to file
-        html_path = self.output_dir / f"newsletter_{timestamp}.html"
-        with open(html_path, 'w', encoding='utf-8') as f:
-            f.write(html_content)
+        # Placeholder values, filled in one sweep over the template.
+        # Plain-text values are escaped; section values are already HTML.
+        subs = {
+            'TITLE': _esc(title),
+            'SUBTITLE': _esc(subtitle),
+            'DATE': date_str,
+            'EXECUTIVE_SUMMARY': executive_summary_html,
+            'METRICS_DASHBOARD': metrics_dashboard_html,
+            'STRATEGIC_INSIGHTS': strategic_insights_html,
+            'KEY_HIGHLIGHTS': key_highlights_html,
+            'FEATURE_ARTICLES': feature_articles_html,
+            'QUICK_BITES': quick_bites_html,
+            'ACTION_ITEMS': action_items_html,
+            'DIAGRAMS': diagrams_html,
+            'TECHNOLOGIES': technologies_html,
+            'BEST_PRACTICES': best_practices_html,
+            'FOOTER_DATE': footer_str,
+        }
         
-        return html_path
+        # Stream template segments straight to disk
+        return self._write_output(html_path, self._iter_template(subs))
+    
+    def _escape_knowledge(self, knowledge: ExtractedKnowledge) -> ExtractedKnowledge:
+        """Return a copy of knowledge with the fields read directly by the HTML builders escaped"""
+        return dataclasses.replace(
+            knowledge,
+            executive_summary=_escape_tree(knowledge.executive_summary),
+            strategic_insights=_escape_tree(knowledge.strategic_insights),
+        )
+    
+    def _iter_template(self, subs: Dict[str, str]):
+        """Yield literal template segments interleaved with placeholder values"""
+        for i, token in enumerate(self._template_tokens):
+            if i % 2:
+                # Odd tokens are placeholder keys; unknown keys are kept verbatim
+                yield subs.get(token, f"{{{{{token}}}}}")
+            else:
+                yield token
     
     def _build_executive_summary(self, summary: str) -> str:
         """Build executive summary HTML"""
@@ -134,240 +342,227 @@ class NewsletterGenerator:
         
         # Split into paragraphs
         paragraphs = summary.split('\n\n') if '\n\n' in summary else [summary]
-        html = ""
+        buf = io.StringIO()
         for para in paragraphs:
             if para.strip():
-                html += f"<p>{para.strip()}</p>\n"
+                buf.write(f"<p>{para.strip()}</p>\n")
         
-        return html
+        return buf.getvalue()
     
-    def _build_key_highlights(self, highlights: List) -> str:
-        """Build key highlights HTML"""
+    @staticmethod
+    @_memoize_section
+    def _build_key_highlights(highlights: List[Dict]) -> str:
+        """Build key highlights HTML from normalized, escaped highlights"""
         if not highlights:
             return "<p>No highlights available.</p>"
         
-        html = ""
+        buf = io.StringIO()
         for highlight in highlights:
-            if isinstance(highlight, dict):
-                title = highlight.get('title', 'Highlight')
-                description = highlight.get('description', '')
-                html += f"""
+            if highlight['title']:
+                buf.write(f"""
                 <div class="highlight-card">
-                    <h3>{title}</h3>
-                    <p>{description}</p>
+                    <h3>{highlight['title']}</h3>
+                    <p>{highlight['description']}</p>
                 </div>
-                """
+                """)
             else:
-                html += f"""
+                buf.write(f"""
                 <div class="highlight-card">
-                    <p>{highlight}</p>
+                    <p>{highlight['description']}</p>
                 </div>
-                """
+                """)
         
-        return html
+        return buf.getvalue()
     
-    def _build_feature_articles(self, articles: List) -> str:
-        """Build feature articles HTML"""
+    @staticmethod
+    @_memoize_section
+    def _build_feature_articles(articles: List[Dict]) -> str:
+        """Build feature articles HTML from normalized, escaped articles"""
         if not articles:
             return ""
         
-        html = '<h2 class="section-header">Feature Articles / Deep Dives</h2>\n'
+        buf = io.StringIO()
+        buf.write('<h2 class="section-header">Feature Articles / Deep Dives</h2>\n')
         
         for article in articles:
-            if isinstance(article, dict):
-                html += '<div class="feature-article">\n'
-                html += f'<h3>{article.get("title", "Feature Article")}</h3>\n'
-                
-                if article.get('context'):
-                    html += '<div class="feature-section">\n'
-                    html += '<h4>Context / Problem Statement</h4>\n'
-                    html += f'<p>{article["context"]}</p>\n'
-                    html += '</div>\n'
-                
-                if article.get('key_ideas'):
-                    html += '<div class="feature-section">\n'
-                    html += '<h4>Key Ideas or Architecture</h4>\n'
-                    html += f'<p>{article["key_ideas"]}</p>\n'
-                    html += '</div>\n'
-                
-                if article.get('benefits'):
-                    html += '<div class="feature-section">\n'
-                    html += '<h4>Benefits & Trade-offs</h4>\n'
-                    html += f'<p>{article["benefits"]}</p>\n'
-                    html += '</div>\n'
-                
-                if article.get('best_practices'):
-                    html += '<div class="feature-section">\n'
-                    html += '<h4>Recommended Best Practices</h4>\n'
-                    html += f'<p>{article["best_practices"]}</p>\n'
-                    html += '</div>\n'
-                
-                if article.get('call_to_action'):
-                    html += '<div class="cta-box">\n'
-                    html += '<strong>Call to Action</strong>\n'
-                    html += f'<p>{article["call_to_action"]}</p>\n'
-                    html += '</div>\n'
-                
-                html += '</div>\n'
+            buf.write('<div class="feature-article">\n')
+            buf.write(f'<h3>{article["title"] or "Feature Article"}</h3>\n')
+            
+            for label, text in article['sections']:
+                buf.write('<div class="feature-section">\n')
+                buf.write(f'<h4>{label}</h4>\n')
+                buf.write(f'<p>{text}</p>\n')
+                buf.write('</div>\n')
+            
+            if article['call_to_action']:
+                buf.write('<div class="cta-box">\n')
+                buf.write('<strong>Call to Action</strong>\n')
+                buf.write(f'<p>{article["call_to_action"]}</p>\n')
+                buf.write('</div>\n')
+            
+            buf.write('</div>\n')
         
-        return html
+        return buf.getvalue()
     
-    def _build_quick_bites(self, quick_bites: List) -> str:
+    @staticmethod
+    @_memoize_section
+    def _build_quick_bites(quick_bites: List) -> str:
         """Build quick bites HTML"""
         if not quick_bites:
             return ""
         
-        html = '<h2 class="section-header">Quick Bites / Short Updates</h2>\n'
-        html += '<div class="quick-bites">\n<ul>\n'
+        buf = io.StringIO()
+        buf.write('<h2 class="section-header">Quick Bites / Short Updates</h2>\n')
+        buf.write('<div class="quick-bites">\n<ul>\n')
         
         for bite in quick_bites:
-            html += f'<li>{bite}</li>\n'
+            buf.write(f'<li>{bite}</li>\n')
         
-        html += '</ul>\n</div>\n'
-        return html
+        buf.write('</ul>\n</div>\n')
+        return buf.getvalue()
     
-    def _build_action_items(self, action_items: Dict) -> str:
-        """Build action items HTML"""
-        if not action_items or not isinstance(action_items, dict):
+    @staticmethod
+    @_memoize_section
+    def _build_action_items(action_items: List) -> str:
+        """Build action items HTML from normalized (audience label, items) pairs"""
+        if not action_items:
             return ""
         
-        html = '<h2 class="section-header">Action Items / Next Steps</h2>\n'
-        html += '<div class="action-items">\n'
-        
-        if action_items.get('engineering_teams'):
-            html += '<h4>For Engineering Teams</h4>\n<ul>\n'
-            for item in action_items['engineering_teams']:
-                html += f'<li>{item}</li>\n'
-            html += '</ul>\n'
-        
-        if action_items.get('architecture_teams'):
-            html += '<h4>For Architecture / Strategy Teams</h4>\n<ul>\n'
-            for item in action_items['architecture_teams']:
-                html += f'<li>{item}</li>\n'
-            html += '</ul>\n'
-        
-        if action_items.get('leadership'):
-            html += '<h4>For Leadership / Decision Makers</h4>\n<ul>\n'
-            for item in action_items['leadership']:
-                html += f'<li>{item}</li>\n'
-            html += '</ul>\n'
-        
-        html += '</div>\n'
-        return html
+        buf = io.StringIO()
+        buf.write('<h2 class="section-header">Action Items / Next Steps</h2>\n')
+        buf.write('<div class="action-items">\n')
+        
+        for label, items in action_items:
+            buf.write(f'<h4>{label}</h4>\n<ul>\n')
+            for item in items:
+                buf.write(f'<li>{item}</li>\n')
+            buf.write('</ul>\n')
+        
+        buf.write('</div>\n')
+        return buf.getvalue()
     
-    def _build_technologies(self, technologies: List) -> str:
+    @staticmethod
+    @_memoize_section
+    def _build_technologies(technologies: List) -> str:
         """Build technologies HTML"""
         if not technologies:
             return ""
         
-        html = '<h2 class="section-header">Technologies Mentioned</h2>\n'
-        html += '<div class="tech-tags">\n'
+        buf = io.StringIO()
+        buf.write('<h2 class="section-header">Technologies Mentioned</h2>\n')
+        buf.write('<div class="tech-tags">\n')
         
         for tech in technologies:
-            html += f'<span class="tech-tag">{tech}</span>\n'
+            buf.write(f'<span class="tech-tag">{tech}</span>\n')
         
-        html += '</div>\n'
-        return html
+        buf.write('</div>\n')
+        return buf.getvalue()
     
-    def _build_best_practices(self, best_practices: List) -> str:
+    @staticmethod
+    @_memoize_section
+    def _build_best_practices(best_practices: List) -> str:
         """Build best practices HTML"""
         if not best_practices:
             return ""
         
-        html = '<h2 class="section-header">Best Practices & Recommendations</h2>\n'
-        html += '<div class="best-practices">\n<ul>\n'
+        buf = io.StringIO()
+        buf.write('<h2 class="section-header">Best Practices & Recommendations</h2>\n')
+        buf.write('<div class="best-practices">\n<ul>\n')
         
         for practice in best_practices:
-            html += f'<li>{practice}</li>\n'
+            buf.write(f'<li>{practice}</li>\n')
         
-        html += '</ul>\n</div>\n'
-        return html
+        buf.write('</ul>\n</div>\n')
+        return buf.getvalue()
     
     def _build_diagrams_section(self, diagrams: List) -> str:
         """Build HTML section for diagrams with Eraser.io images"""
         if not diagrams:
             return ""
         
-        html = '<div class="section diagrams-section">\n'
-        html += '  <h2 class="section-header">📊 Technical Architecture & Diagrams</h2>\n'
+        buf = io.StringIO()
+        buf.write('<div class="section diagrams-section">\n')
+        buf.write('  <h2 class="section-header">📊 Technical Architecture & Diagrams</h2>\n')
         
         for diagram in diagrams:
-            html += '<div class="diagram-container">\n'
-            html += f'  <h3>{diagram.title}</h3>\n'
-            html += f'  <p class="diagram-purpose">{diagram.purpose}</p>\n'
+            buf.write('<div class="diagram-container">\n')
+            buf.write(f'  <h3>{_esc(diagram.title)}</h3>\n')
+            buf.write(f'  <p class="diagram-purpose">{_esc(diagram.purpose)}</p>\n')
             
             # Use Eraser image if available, otherwise Mermaid
-            if hasattr(diagram, 'eraser_image_path') and diagram.eraser_image_path:
+            # (DiagramSpec declares these as Optional fields, so truthiness is enough)
+            if diagram.eraser_image_path:
                 # Eraser.io professional diagram
-                html += f'  <img src="{diagram.eraser_image_path}" alt="{diagram.title}" class="diagram-image" />\n'
+                buf.write(f'  <img src="{_esc(diagram.eraser_image_path)}" alt="{_esc(diagram.title)}" class="diagram-image" />\n')
                 
                 # Add edit link if available
-                if hasattr(diagram, 'eraser_edit_url') and diagram.eraser_edit_url:
-                    html += f'  <a href="{diagram.eraser_edit_url}" class="diagram-edit-link" target="_blank">✏️ Edit Diagram</a>\n'
-            elif hasattr(diagram, 'mermaid_code') and diagram.mermaid_code:
+                if diagram.eraser_edit_url:
+                    buf.write(f'  <a href="{_esc(diagram.eraser_edit_url)}" class="diagram-edit-link" target="_blank">✏️ Edit Diagram</a>\n')
+            elif diagram.mermaid_code:
                 # Mermaid.js fallback
-                html += f'  <div class="mermaid">\n{diagram.mermaid_code}\n  </div>\n'
+                buf.write(f'  <div class="mermaid">\n{_esc(diagram.mermaid_code)}\n  </div>\n')
             
-            html += f'  <p class="diagram-description">{diagram.description}</p>\n'
-            html += '</div>\n'
+            buf.write(f'  <p class="diagram-description">{_esc(diagram.description)}</p>\n')
+            buf.write('</div>\n')
         
-        html += '</div>\n'
-        return html
+        buf.write('</div>\n')
+        return buf.getvalue()
     
     def _build_strategic_insights_section(self, strategic_insights: Dict) -> str:
         """Build strategic insights section"""
         if not strategic_insights:
             return ""
         
-        html = '<div class="section strategic-insights">\n'
-        html += '  <h2 class="section-header">Strategic Insights</h2>\n'
+        buf = io.StringIO()
+        buf.write('<div class="section strategic-insights">\n')
+        buf.write('  <h2 class="section-header">Strategic Insights</h2>\n')
         
         if strategic_insights.get('business_impact'):
-            html += f'<div class="insight-card impact">\n'
-            html += f'  <h4>💼 Business Impact</h4>\n'
-            html += f'  <p>{strategic_insights["business_impact"]}</p>\n'
-            html += f'</div>\n'
+            buf.write(f'<div class="insight-card impact">\n')
+            buf.write(f'  <h4>💼 Business Impact</h4>\n')
+            buf.write(f'  <p>{strategic_insights["business_impact"]}</p>\n')
+            buf.write(f'</div>\n')
         
         if strategic_insights.get('risk_factors'):
-            html += f'<div class="insight-card risk">\n'
-            html += f'  <h4>⚠️ Risk Factors</h4>\n'
-            html += f'  <p>{strategic_insights["risk_factors"]}</p>\n'
-            html += f'</div>\n'
+            buf.write(f'<div class="insight-card risk">\n')
+            buf.write(f'  <h4>⚠️ Risk Factors</h4>\n')
+            buf.write(f'  <p>{strategic_insights["risk_factors"]}</p>\n')
+            buf.write(f'</div>\n')
         
         if strategic_insights.get('strategic_opportunities'):
-            html += f'<div class="insight-card opportunity">\n'
-            html += f'  <h4>🚀 Strategic Opportunities</h4>\n'
-            html += f'  <p>{strategic_insights["strategic_opportunities"]}</p>\n'
-            html += f'</div>\n'
+            buf.write(f'<div class="insight-card opportunity">\n')
+            buf.write(f'  <h4>🚀 Strategic Opportunities</h4>\n')
+            buf.write(f'  <p>{strategic_insights["strategic_opportunities"]}</p>\n')
+            buf.write(f'</div>\n')
         
-        html += '</div>\n'
-        return html
+        buf.write('</div>\n')
+        return buf.getvalue()
     
-    def _build_metrics_dashboard(self, knowledge) -> str:
+    def _build_metrics_dashboard(self, knowledge: ExtractedKnowledge) -> str:
         """Build metrics dashboard from extracted data"""
         metrics = []
         
         # Extract metrics from content
-        if hasattr(knowledge, 'key_highlights') and knowledge.key_highlights:
+        if knowledge.key_highlights:
             metrics.append({
                 'value': len(knowledge.key_highlights),
                 'label': 'Key Insights'
             })
         
-        if hasattr(knowledge, 'technologies') and knowledge.technologies:
+        if knowledge.technologies:
             metrics.append({
                 'value': len(knowledge.technologies),
                 'label': 'Technologies'
             })
         
-        if hasattr(knowledge, 'feature_articles') and knowledge.feature_articles:
+        if knowledge.feature_articles:
             metrics.append({
                 'value': len(knowledge.feature_articles),
                 'label': 'Deep Dives'
             })
         
         # Look for numerical metrics in strategic insights
-        if hasattr(knowledge, 'strategic_insights') and knowledge.strategic_insights:
+        if knowledge.strategic_insights:
             if knowledge.strategic_insights.get('key_metrics'):
                 for metric in knowledge.strategic_insights['key_metrics']:
                     if isinstance(metric, dict):
@@ -376,45 +571,27 @@ class NewsletterGenerator:
         if not metrics:
             return ""
         
-        html = '<div class="metrics-dashboard">\n'
+        buf = io.StringIO()
+        buf.write('<div class="metrics-dashboard">\n')
         for metric in metrics[:4]:  # Max 4 metrics
-            html += f'  <div class="metric-card">\n'
-            html += f'    <span class="metric-value">{metric["value"]}</span>\n'
-            html += f'    <span class="metric-label">{metric["label"]}</span>\n'
-            html += f'  </div>\n'
-        html += '</div>\n'
-        
-        return html
-    
-    def _build_diagrams_markdown(self, diagrams: List) -> str:
-        """Build Markdown section for diagrams"""
-        if not diagrams:
-            return ""
-        
-        md = "\n\n## 📊 Technical Architecture & Diagrams\n\n"
-        
-        for diagram in diagrams:
-            md += f"### {diagram.title}\n\n"
-            md += f"**Purpose:** {diagram.purpose}\n\n"
-            
-            if hasattr(diagram, 'mermaid_code') and diagram.mermaid_code:
-                md += f"```mermaid\n{diagram.mermaid_code}\n```\n\n"
-            
-            md += f"*{diagram.description}*\n\n"
-            md += "---\n\n"
+            buf.write(f'  <div class="metric-card">\n')
+            buf.write(f'    <span class="metric-value">{metric["value"]}</span>\n')
+            buf.write(f'    <span class="metric-label">{metric["label"]}</span>\n')
+            buf.write(f'  </div>\n')
+        buf.write('</div>\n')
         
-        return md
+        return buf.getvalue()
     
-    def _generate_markdown(self, knowledge: ExtractedKnowledge, 
-                          title: str, subtitle: str, timestamp: str,
+    def _generate_markdown(self, knowledge: ExtractedKnowledge, sections: Dict,
+                          title: str, subtitle: str, md_path: Path, date_str: str,
                           diagrams: List = None) -> Path:  # NEW: diagrams param
         """Generate Markdown newsletter with embedded diagrams"""
         
-        md_content = f"""# {title}
+        parts = [f"""# {title}
 
 **{subtitle}**
 
-*Generated: {datetime.now().strftime('%B %d, %Y')}*
+*Generated: {date_str}*
 
 ---
 
@@ -426,98 +603,67 @@ class NewsletterGenerator:
 
 ## Key Highlights / What's New
 
-"""
+"""]
         
         # Add key highlights
-        for i, highlight in enumerate(knowledge.key_highlights, 1):
-            if isinstance(highlight, dict):
-                md_content += f"### {i}. {highlight.get('title', 'Highlight')}\n\n"
-                md_content += f"{highlight.get('description', '')}\n\n"
+        for i, highlight in enumerate(sections['key_highlights'], 1):
+            if highlight['title']:
+                parts.append(f"### {i}. {highlight['title']}\n\n")
+                parts.append(f"{highlight['description']}\n\n")
             else:
-                md_content += f"### {i}. {highlight}\n\n"
+                parts.append(f"### {i}. {highlight['description']}\n\n")
         
         # Add feature articles
-        if knowledge.feature_articles:
-            md_content += "\n---\n\n## Feature Articles / Deep Dives\n\n"
+        if sections['feature_articles']:
+            parts.append("\n---\n\n## Feature Articles / Deep Dives\n\n")
             
-            for article in knowledge.feature_articles:
-                if isinstance(article, dict):
-                    md_content += f"### {article.get('title', 'Feature')}\n\n"
-                    
-                    if article.get('context'):
-                        md_content += f"**Context / Problem Statement**\n\n{article['context']}\n\n"
-                    
-                    if article.get('key_ideas'):
-                        md_content += f"**Key Ideas or Architecture**\n\n{article['key_ideas']}\n\n"
-                    
-                    if article.get('benefits'):
-                        md_content += f"**Benefits & Trade-offs**\n\n{article['benefits']}\n\n"
-                    
-                    if article.get('best_practices'):
-                        md_content += f"**Recommended Best Practices**\n\n{article['best_practices']}\n\n"
-                    
-                    if article.get('call_to_action'):
-                        md_content += f"**Call to Action**\n\n{article['call_to_action']}\n\n"
-                    
-                    md_content += "---\n\n"
+            for article in sections['feature_articles']:
+                parts.append(f"### {article['title'] or 'Feature'}\n\n")
+                
+                for label, text in article['sections']:
+                    parts.append(f"**{label}**\n\n{text}\n\n")
+                
+                if article['call_to_action']:
+                    parts.append(f"**Call to Action**\n\n{article['call_to_action']}\n\n")
+                
+                parts.append("---\n\n")
         
         # Add quick bites
-        if knowledge.quick_bites:
-            md_content += "\n## Quick Bites / Short Updates\n\n"
-            for bite in knowledge.quick_bites:
-                md_content += f"- {bite}\n"
-            md_content += "\n"
+        if sections['quick_bites']:
+            parts.append("\n## Quick Bites / Short Updates\n\n")
+            for bite in sections['quick_bites']:
+                parts.append(f"- {bite}\n")
+            parts.append("\n")
         
         # Add action items
-        if knowledge.action_items:
-            md_content += "\n---\n\n## Action Items / Next Steps\n\n"
+        if sections['action_items']:
+            parts.append("\n---\n\n## Action Items / Next Steps\n\n")
             
-            if isinstance(knowledge.action_items, dict):
-                if knowledge.action_items.get('engineering_teams'):
-                    md_content += "### For Engineering Teams\n\n"
-                    for item in knowledge.action_items['engineering_teams']:
-                        md_content += f"- {item}\n"
-                    md_content += "\n"
-                
-                if knowledge.action_items.get('architecture_teams'):
-                    md_content += "### For Architecture / Strategy Teams\n\n"
-                    for item in knowledge.action_items['architecture_teams']:
-                        md_content += f"- {item}\n"
-                    md_content += "\n"
-                
-                if knowledge.action_items.get('leadership'):
-                    md_content += "### For Leadership / Decision Makers\n\n"
-                    for item in knowledge.action_items['leadership']:
-                        md_content += f"- {item}\n"
-                    md_content += "\n"
+            for label, items in sections['action_items']:
+                parts.append(f"### {label}\n\n")
+                for item in items:
+                    parts.append(f"- {item}\n")
+                parts.append("\n")
         
         # Add diagrams (NEW)
         if diagrams:
-            md_content += self._build_diagrams_markdown(diagrams)
+            parts.append(self._build_diagrams_markdown(diagrams))
         
         # Add technologies
-        if knowledge.technologies:
-            md_content += "\n---\n\n## Technologies Mentioned\n\n"
-            md_content += ", ".join(knowledge.technologies)
-            md_content += "\n\n"
+        if sections['technologies']:
+            parts.append("\n---\n\n## Technologies Mentioned\n\n")
+            parts.append(", ".join(sections['technologies']))
+            parts.append("\n\n")
         
         # Add best practices
-        if knowledge.best_practices:
-            md_content += "\n## Best Practices & Recommendations\n\n"
-            for practice in knowledge.best_practices:
-                md_content += f"- {practice}\n"
-            md_content += "\n"
-        
-        # Add diagrams section (NEW)
-        if diagrams:
-            md_content += self._build_diagrams_markdown(diagrams)
+        if sections['best_practices']:
+            parts.append("\n## Best Practices & Recommendations\n\n")
+            for practice in sections['best_practices']:
+                parts.append(f"- {practice}\n")
+            parts.append("\n")
         
         # Write to file
-        md_path = self.output_dir / f"newsletter_{timestamp}.md"
-        with open(md_path, 'w', encoding='utf-8') as f:
-            f.write(md_content)
-        
-        return md_path
+        return self._write_output(md_path, parts)
     
     def _build_diagrams_markdown(self, diagrams: List) -> str:
         """
@@ -532,44 +678,44 @@ class NewsletterGenerator:
         if not diagrams:
             return ""
         
-        md = "\n\n## 📊 Technical Architecture & Diagrams\n\n"
+        buf = io.StringIO()
+        buf.write("\n\n## 📊 Technical Architecture & Diagrams\n\n")
         
         for diagram in diagrams:
-            md += f"### {diagram.title}\n\n"
-            md += f"**Purpose:** {diagram.purpose}\n\n"
+            buf.write(f"### {diagram.title}\n\n")
+            buf.write(f"**Purpose:** {diagram.purpose}\n\n")
             
             # mermaid_code is Optional[str], truthiness check skips None and empty strings
             if diagram.mermaid_code:
-                md += f"```mermaid\n{diagram.mermaid_code}\n```\n\n"
+                buf.write(f"```mermaid\n{diagram.mermaid_code}\n```\n\n")
             
-            md += f"*{diagram.description}*\n\n---\n\n"
+            buf.write(f"*{diagram.description}*\n\n---\n\n")
         
-        return md
+        return buf.getvalue()
     
     def _generate_json(self, knowledge: ExtractedKnowledge, 
-                      title: str, subtitle: str, timestamp: str,
+                      title: str, subtitle: str, json_path: Path, iso_str: str,
                       diagrams: List = None) -> Path:  # NEW: diagrams param
         """Generate JSON newsletter data with diagrams"""
         
         # Build diagrams data for JSON
-        diagrams_data = []
-        if diagrams:
-            for diagram in diagrams:
-                diagram_dict = {
-                    'title': diagram.title,
-                    'type': diagram.diagram_type,
-                    'purpose': diagram.purpose,
-                    'elements': diagram.elements,
-                    'description': diagram.description
-                }
-                if hasattr(diagram, 'mermaid_code') and diagram.mermaid_code:
-                    diagram_dict['mermaid_code'] = diagram.mermaid_code
-                diagrams_data.append(diagram_dict)
+        diagrams_data = [
+            {
+                'title': d.title,
+                'diagram_type': d.diagram_type,
+                'purpose': d.purpose,
+                'elements': d.elements,
+                'description': d.description,
+                'mermaid_code': d.mermaid_code,
+                'eraser_code': d.eraser_code,
+                'image_path': d.image_path
+            } for d in diagrams or []
+        ]
         
         json_data = {
             'title': title,
             'subtitle': subtitle,
-            'generated_at': datetime.now().isoformat(),
+            'generated_at': iso_str,
             'executive_summary': knowledge.executive_summary,
             'key_highlights': knowledge.key_highlights,
             'feature_articles': knowledge.feature_articles,
@@ -583,52 +729,61 @@ class NewsletterGenerator:
             'metadata': knowledge.metadata
         }
         
-        # Add diagrams array (NEW)
-        if diagrams:
-            json_data['diagrams'] = [
-                {
-                    'title': d.title,
-                    'diagram_type': d.diagram_type,
-                    'purpose': d.purpose,
-                    'elements': d.elements,
-                    'description': d.description,
-                    'mermaid_code': d.mermaid_code,
-                    'eraser_code': d.eraser_code,
-                    'image_path': d.image_path
-                } for d in diagrams
-            ]
-        
         # Write to file
-        json_path = self.output_dir / f"newsletter_{timestamp}.json"
-        with open(json_path, 'w', encoding='utf-8') as f:
-            json.dump(json_data, f, indent=2, ensure_ascii=False)
+        if ORJSON_AVAILABLE:
+            # orjson encodes straight to UTF-8 bytes in C
+            chunks = [orjson.dumps(json_data, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS)]
+        else:
+            chunks = json.JSONEncoder(indent=2, ensure_ascii=False).iterencode(json_data)
         
-        return json_path
+        return self._write_output(json_path, chunks)
     
     def _generate_html_inline(self, knowledge: ExtractedKnowledge, 
-                             title: str, subtitle: str, timestamp: str) -> Path:
+                             title: str, subtitle: str, html_path: Path,
+                             date_str: str) -> Path:
         """Fallback inline HTML generation (if template not found)"""
         # This is the old method - kept as fallback
         html_content = f"""<!DOCTYPE html>
 <html>
 <head>
-    <title>{title}</title>
+    <title>{_esc(title)}</title>
     <style>body {{ font-family: 'Segoe UI', sans-serif; max-width: 800px; margin: 0 auto; padding: 20px; }}</style>
 </head>
 <body>
-    <h1>{title}</h1>
-    <h2>{subtitle}</h2>
-    <p><em>{datetime.now().strftime('%B %d, %Y')}</em></p>
+    <h1>{_esc(title)}</h1>
+    <h2>{_esc(subtitle)}</h2>
+    <p><em>{date_str}</em></p>
     <h2>Executive Summary</h2>
-    <p>{knowledge.executive_summary}</p>
+    <p>{_esc(knowledge.executive_summary)}</p>
 </body>
 </html>"""
         
-        html_path = self.output_dir / f"newsletter_{timestamp}.html"
-        with open(html_path, 'w', encoding='utf-8') as f:
-            f.write(html_content)
+        return self._write_output(html_path, [html_content])
+    
+    def _write_output(self, path: Path, chunks: Iterable[Union[str, bytes]]) -> Path:
+        """
+        Stream output content to `path` without exposing a partially written file
+        
+        The content goes to a temporary file next to `path` and is published with
+        os.replace; the temporary file is removed on failure.
+        
+        Args:
+            path: Output path returned to callers
+            chunks: Output content as str (UTF-8 encoded here) or bytes
         
-        return html_path
+        Returns:
+            The output path
+        """
+        tmp_path = path.with_name(path.name + '.tmp')
+        try:
+            with open(tmp_path, 'wb', buffering=self.WRITE_BUFFER_SIZE) as f:
+                for chunk in chunks:
+                    f.write(chunk.encode('utf-8') if isinstance(chunk, str) else chunk)
+            os.replace(tmp_path, path)
+        finally:
+            tmp_path.unlink(missing_ok=True)
+        
+        return path
 
 
 if __name__ == "__main__":
@@ -5,19 +5,266 @@ Handles document chunking and knowledge extraction with direct LLM calls (no vec
 """
 
 import os
+import sys
 import json
 import re
-from typing import List, Dict, Optional
+import copy
+import time
+import random
+import asyncio
+import hashlib
+import heapq
+import functools
+import weakref
+import threading
+import concurrent.futures
+from typing import AsyncIterator, Iterable, List, Dict, Optional, Tuple
 from dataclasses import dataclass, field
+from types import MappingProxyType
 
 try:
-    from openai import OpenAI
+    from openai import OpenAI, AsyncOpenAI, Timeout
+    from openai import APIError, RateLimitError, APIConnectionError, InternalServerError
+    import httpx
     OPENAI_AVAILABLE = True
+    try:
+        from openai import DefaultAsyncHttpxClient
+    except ImportError:
+        # Early openai 1.x releases lack it; a plain httpx client takes the same pool options
+        DefaultAsyncHttpxClient = httpx.AsyncClient
+    # Transient failures worth retrying (APITimeoutError subclasses APIConnectionError)
+    _RETRYABLE_ERRORS = (RateLimitError, APIConnectionError, InternalServerError)
+    _API_ERRORS = (APIError,)
 except ImportError:
     OPENAI_AVAILABLE = False
+    _RETRYABLE_ERRORS = ()
+    _API_ERRORS = ()
 
+try:
+    import h2  # noqa: F401 - enables HTTP/2 in httpx
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
+try:
+    import tiktoken
+    TIKTOKEN_AVAILABLE = True
+except ImportError:
+    TIKTOKEN_AVAILABLE = False
+
+try:
+    from json_repair import repair_json
+    JSON_REPAIR_AVAILABLE = True
+except ImportError:
+    JSON_REPAIR_AVAILABLE = False
+
+try:
+    import diskcache
+    DISKCACHE_AVAILABLE = True
+except ImportError:
+    DISKCACHE_AVAILABLE = False
+
+
+# Process-wide OpenAI clients and the per-thread event loops that drive the blocking
+# entry points. Engines share one sync client. Async clients hold loop-bound connection
+# pools, so there is one per event loop (dropped when the loop is garbage collected).
+_CLIENT = None
+_ASYNC_CLIENTS = weakref.WeakKeyDictionary()
+_THREAD_STATE = threading.local()
+
+
+def _api_key() -> str:
+    """OPENAI_API_KEY from the environment (RuntimeError if unset)"""
+    api_key = os.environ.get('OPENAI_API_KEY')
+    if not api_key:
+        raise RuntimeError("OPENAI_API_KEY is not set")
+    return api_key
+
+
+def _get_client():
+    """Return the shared OpenAI client, creating it on first use"""
+    global _CLIENT
+    if _CLIENT is None:
+        _CLIENT = OpenAI(api_key=_api_key())
+    return _CLIENT
+
+
+def _get_async_client():
+    """Return the AsyncOpenAI client for the running event loop, creating it on first use there"""
+    loop = asyncio.get_running_loop()
+    aclient = _ASYNC_CLIENTS.get(loop)
+    if aclient is None:
+        # Keep-alive pool sized for concurrent extraction passes; with HTTP/2 the
+        # passes multiplex over a single connection. Fail fast on connect, allow
+        # 60s for generation.
+        aclient = _ASYNC_CLIENTS[loop] = AsyncOpenAI(
+            api_key=_api_key(),
+            max_retries=0,  # retries are handled by RAGEngine._create_completion
+            http_client=DefaultAsyncHttpxClient(
+                http2=HTTP2_AVAILABLE,
+                limits=httpx.Limits(max_keepalive_connections=32, max_connections=64),
+                timeout=Timeout(60.0, connect=5.0)
+            )
+        )
+    return aclient
 
-@dataclass
+
+async def aclose_clients():
+    """Close the shared OpenAI client and the running loop's async client (recreated on next use)"""
+    global _CLIENT
+    if _CLIENT is not None:
+        _CLIENT.close()
+        _CLIENT = None
+    await _aclose_async_client()
+
+
+async def _aclose_async_client():
+    """Close the running loop's async client, if it has one"""
+    aclient = _ASYNC_CLIENTS.pop(asyncio.get_running_loop(), None)
+    if aclient is not None:
+        await aclient.close()
+
+
+def _get_event_loop() -> asyncio.AbstractEventLoop:
+    """Return this thread's event loop for the blocking RAGEngine methods (threads never share one)"""
+    loop = getattr(_THREAD_STATE, 'loop', None)
+    if loop is None or loop.is_closed():
+        loop = _THREAD_STATE.loop = asyncio.new_event_loop()
+    return loop
+
+
+async def _closing_async_client(coro):
+    """Await coro, then close the async client it used on this (short-lived) loop"""
+    try:
+        return await coro
+    finally:
+        await _aclose_async_client()
+
+
+def _run_blocking(coro):
+    """
+    Run a coroutine to completion from blocking code
+    Uses this thread's loop, or a private loop in a worker thread when called from inside a running loop (e.g. Jupyter)
+    """
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return _get_event_loop().run_until_complete(coro)
+    with concurrent.futures.ThreadPoolExecutor(max_workers=1) as executor:
+        return executor.submit(asyncio.run, _closing_async_client(coro)).result()
+
+
+@functools.lru_cache(maxsize=None)
+def _get_encoding(model: str):
+    """tiktoken encoding for a model (o200k_base for models tiktoken does not know)"""
+    try:
+        return tiktoken.encoding_for_model(model)
+    except KeyError:
+        return tiktoken.get_encoding("o200k_base")
+
+
+# Whitespace-delimited words, matching str.split()
+_WORD_RE = re.compile(r'\S+')
+
+# Patterns used when parsing LLM responses
+# One list item per line: surrounding whitespace and a leading bullet/number are dropped
+_LIST_ITEM_RE = re.compile(r'^[^\S\n]*(?:[\d\-\*\•]+[\.\)][^\S\n]*)?(.*?)[^\S\n]*$', re.MULTILINE)
+_JSON_BLOCK_RE = re.compile(r'```json\s*\n(.*?)\n```', re.DOTALL)
+_JSON_START_RE = re.compile(r'[\[{]')
+_JSON_DECODER = json.JSONDecoder()
+
+# Terms that mark a document as technical enough for architecture and diagram sections
+_TECHNICAL_HINTS_RE = re.compile(
+    r'architect|microservice|infrastructure|deploy|pipeline|integration|workflow|'
+    r'platform|\bapis?\b|cloud|kubernetes|database|system design',
+    re.IGNORECASE
+)
+
+# Light near-JSON cleanup used when json_repair is not installed
+_TRAILING_COMMA_RE = re.compile(r',\s*([\]}])')
+_SMART_QUOTES_TABLE = str.maketrans({'\u201c': '"', '\u201d': '"'})
+
+
+def _loads_json(text: str):
+    """Parse JSON with orjson when available (orjson.JSONDecodeError subclasses json.JSONDecodeError)"""
+    return orjson.loads(text) if ORJSON_AVAILABLE else json.loads(text)
+
+
+def _scan_json(text: str, expected_type=None):
+    """
+    Return the first complete top-level JSON array/object embedded in text (of expected_type if given), or None
+    Values nested inside another bracketed value are never returned, so a truncated outer value yields None
+    """
+    pos = 0
+    while True:
+        match = _JSON_START_RE.search(text, pos)
+        if not match:
+            return None
+        try:
+            value, pos = _JSON_DECODER.raw_decode(text, match.start())
+        except ValueError:
+            # Not valid JSON: skip past its closing bracket, or give up if it is never closed
+            pos = _skip_brackets(text, match.start())
+            if pos < 0:
+                return None
+            continue
+        if expected_type is None or isinstance(value, expected_type):
+            return value
+
+
+def _skip_brackets(text: str, start: int) -> int:
+    """Index just past the bracket matching text[start] (brackets inside JSON strings ignored), or -1"""
+    depth = 0
+    in_string = False
+    escaped = False
+    for i in range(start, len(text)):
+        char = text[i]
+        if in_string:
+            if escaped:
+                escaped = False
+            elif char == '\\':
+                escaped = True
+            elif char == '"':
+                in_string = False
+        elif char == '"':
+            in_string = True
+        elif char in '[{':
+            depth += 1
+        elif char in ']}':
+            depth -= 1
+            if depth == 0:
+                return i + 1
+    return -1
+
+
+def _json_span(text: str) -> str:
+    """Slice from the first opening bracket to the last matching closing bracket (text itself if none)"""
+    start = _JSON_START_RE.search(text)
+    if not start:
+        return text
+    end = text.rfind(']' if start.group() == '[' else '}')
+    return text[start.start():end + 1] if end > start.start() else text[start.start():]
+
+
+def _repair_json(text: str) -> str:
+    """Fix common LLM near-JSON: trailing commas, smart quotes (full repair via json_repair if installed)"""
+    if JSON_REPAIR_AVAILABLE:
+        return repair_json(text)
+    return _TRAILING_COMMA_RE.sub(r'\1', text.translate(_SMART_QUOTES_TABLE))
+
+
+class ExtractionError(Exception):
+    """An extraction LLM call failed: retries exhausted, API error, or no result in the batch output"""
+
+
+# dataclass(slots=True) needs Python 3.10; older interpreters keep a per-instance __dict__
+@dataclass(**({'slots': True} if sys.version_info >= (3, 10) else {}))
 class ExtractedKnowledge:
     """Container for extracted knowledge from documents"""
     executive_summary: str = ""
@@ -39,16 +286,182 @@ class RAGEngine:
     Direct LLM extraction without vector database dependency
     """
     
-    def __init__(self, chunk_size: int = 1500, chunk_overlap: int = 200):
-        """Initialize RAG engine with enhanced parameters"""
+    # Prompt templates per extraction call, formatted with str.format (read-only)
+    _PROMPT_TEMPLATES = MappingProxyType({
+        'short_document': """Based on the following short content, extract:
+- executive_summary: strategic executive summary (1 paragraph) that leads with business impact
+- key_highlights: array of 2-4 objects with "title" (assertive, 7-10 words), "description" (1-2 specific sentences) and "category" ("Business Impact" | "Risk Factor" | "Strategic Opportunity")
+- quick_bites: array of strings, 1-3 short updates or tips (1-2 sentences each)
+
+Return a single JSON object with these three keys.
+
+Content:
+{content}
+
+Short Document Extraction (JSON):""",
+
+        'executive_summary': """Based on the following content, provide a strategic executive summary (2-3 paragraphs) that leads with business impact framing.
+
+REQUIREMENTS:
+- Lead with Business Impact: Why does this matter to the business?
+- Risk Factors: What risks or challenges are highlighted?
+- Strategic Opportunities: What opportunities for growth or competitive advantage?
+- Use assertive, analytical language (NOT passive or speculative)
+- Include specific data points and concrete examples
+- Executive-grade prose with authority
+
+Content:
+{context_text}
+
+Strategic Executive Summary:""",
+
+        'key_highlights': """Based on the following high-impact content, extract 5-7 key highlights.
+
+For each highlight, provide:
+- title: Assertive, impactful title (7-10 words) - NO vague generalities
+- description: Specific description (2-3 sentences) with concrete examples and data points
+- category: One of "Business Impact" | "Risk Factor" | "Strategic Opportunity"
+
+AVOID:
+- Vague generalities
+- Passive voice
+- Speculative language (might, could, possibly, maybe)
+
+Return as JSON array of objects with "title", "description", and "category" keys.
+
+Content:
+{context_text}
+
+Key Highlights (JSON):""",
+
+        'feature_articles': """Based on the following content, identify 2-4 major topics for deep-dive feature articles.
+
+For each article, provide:
+- title: Clear, descriptive title
+- context: Problem statement or background with concrete examples
+- key_ideas: Detailed technical concepts (extract specific examples, NOT generic descriptions)
+- benefits: Quantified benefits when possible
+- best_practices: Actionable best practices (specific, not generic)
+- call_to_action: Specific next step with timeline
+
+REQUIREMENTS:
+- Extract specific examples and details from content
+- Each article must have UNIQUE insights (no repetition across articles)
+- Use assertive, analytical language
+- Avoid vague generalities
+
+Return as JSON array of objects.
+
+Content:
+{context_text}
+
+Feature Articles (JSON):""",
+
+        'supporting_content': """Based on the following content, extract the supporting newsletter sections below.
+
+Use assertive language and be specific and actionable.
+
+Return a single JSON object with exactly these keys:
+{sections}
+
+Example of the expected shape for the list sections (other keys omitted):
+{{"quick_bites": ["Azure Container Apps now supports serverless GPUs in preview."], "technologies": ["Azure Kubernetes Service", "Terraform"], "best_practices": ["Pin container base images by digest so CI builds are reproducible."]}}
+
+Content:
+{context_text}
+
+Supporting Content (JSON):""",
+
+        'strategic_insights': """Analyze the following content for strategic framing. Extract:
+- business_impact: How this impacts business outcomes (revenue, cost, efficiency)
+- risk_factors: Key risks and challenges identified
+- strategic_opportunities: Opportunities for growth or competitive advantage
+- key_metrics: Any KPIs or metrics mentioned
+
+Return as JSON object with these four keys.
+
+Content:
+{context_text}
+
+Strategic Insights (JSON):""",
+    })
+    
+    # Chat model used for every pass unless overridden per call
+    DEFAULT_MODEL = "gpt-4o-mini"
+    
+    # System prompt shared by every extraction pass
+    _SYSTEM_PROMPT = """You are a senior executive technology analyst and strategic content writer.
+
+WRITING STYLE:
+- Assertive and analytical (not passive or speculative)
+- Lead with impact and "so what?"
+- Use specific data points and concrete examples
+- Executive-grade prose with authority
+
+AVOID:
+- Speculative language (might, could, possibly, maybe)
+- Vague generalities
+- Repetitive content
+- Safe/passive voice"""
+    
+    # Rough chars-per-token ratio used to budget context when tiktoken is unavailable
+    CHARS_PER_TOKEN = 4
+    
+    # Bump to invalidate cached LLM responses after prompt or parsing changes
+    CACHE_VERSION = 1
+    
+    # Seconds a cached chunking of a document stays valid
+    CHUNK_CACHE_TTL = 86400
+    
+    # Upper bound on in-flight LLM requests per engine
+    MAX_CONCURRENT_REQUESTS = 9
+    
+    # Pass 4 sections requested only for technical documents (see _TECHNICAL_HINTS_RE)
+    TECHNICAL_SECTIONS = frozenset({'architectures', 'diagram_suggestions'})
+    
+    # Documents below this word count get a single-call extraction (see _extract_short)
+    SHORT_DOCUMENT_WORDS = 200
+    
+    # Attempts per LLM call on rate limits, connection errors and 5xx responses
+    MAX_RETRIES = 5
+    
+    # Stop generation once the model starts echoing the prompt scaffold
+    STOP_SEQUENCES = ["\n\nContent:"]
+    
+    # Pass 4 sections requested together in one JSON-object call: (key, type, instructions)
+    SUPPORTING_SECTIONS = (
+        ('quick_bites', list,
+         'array of strings, 3-5 short updates, tips, or minor announcements (1-2 sentences each)'),
+        ('action_items', dict,
+         'object with keys "engineering_teams" (actions for developers and engineers), '
+         '"architecture_teams" (actions for architects and strategy teams) and '
+         '"leadership" (actions for decision makers), each an array of concrete action items'),
+        ('technologies', list,
+         'array of strings naming the technologies, tools, platforms, and services mentioned '
+         '(names only, at most 30)'),
+        ('architectures', list,
+         'array of key architectures or design patterns, each an object with "name", '
+         '"description", "components" (key components or services) and "use_case" (when to use it)'),
+        ('best_practices', list,
+         'array of strings, 4-6 specific, actionable best practices or recommendations'),
+        ('diagram_suggestions', list,
+         'array of 3-4 technical diagrams that would help explain the content, each an object with '
+         '"type" ("architecture" | "workflow" | "integration" | "security"), "title", '
+         '"purpose" (what it explains and who it\'s for), "elements" (list of key components/nodes) '
+         'and "description" (how to recreate it)'),
+    )
+    
+    def __init__(self, chunk_size: int = 1500, chunk_overlap: int = 200, cache_dir: Optional[str] = ".rag_cache",
+                 model: str = DEFAULT_MODEL):
+        """Initialize RAG engine with enhanced parameters (cache_dir=None disables the response cache)"""
         self.chunk_size = chunk_size
         self.chunk_overlap = chunk_overlap
+        self.model = model
         
-        # Initialize OpenAI with API key from environment
+        # Shared OpenAI clients, keyed from the environment (see the client / aclient properties)
         if OPENAI_AVAILABLE:
             try:
-                api_key = os.environ.get('OPENAI_API_KEY', 'api_key_placeholder')
-                self.client = OpenAI(api_key=api_key)
+                _get_client()
                 self.llm_available = True
                 print("✓ OpenAI LLM initialized")
             except Exception as e:
@@ -58,6 +471,22 @@ class RAGEngine:
             self.llm_available = False
             print("⚠ OpenAI not available")
         
+        # On-disk cache of LLM responses keyed by request hash
+        self.response_cache = None
+        if cache_dir and DISKCACHE_AVAILABLE:
+            self.response_cache = diskcache.Cache(cache_dir)
+            print(f"✓ LLM response cache: {cache_dir}")
+        
+        # Concurrency control for the async extraction passes, one semaphore per event loop
+        self._llm_semaphores = weakref.WeakKeyDictionary()
+        
+        # Extracted knowledge keyed by sha256 of the document content
+        self._result_cache: Dict[str, ExtractedKnowledge] = {}
+        
+        # Set by extract_knowledge_batch while it collects requests / replays batch output
+        self._batch_requests = None
+        self._batch_results = None
+        
         # Skip vector DB initialization
         self.chroma_client = None
         self.collection = None
@@ -75,43 +504,84 @@ class RAGEngine:
             'infrastructure', 'system', 'platform', 'service', 'api'
         ]
     
+    @property
+    def client(self):
+        """Shared OpenAI client (recreated after aclose_clients)"""
+        return _get_client()
+    
+    @property
+    def aclient(self):
+        """AsyncOpenAI client for the running event loop"""
+        return _get_async_client()
+    
+    def _get_llm_semaphore(self) -> asyncio.Semaphore:
+        """LLM request semaphore for the running event loop (asyncio primitives bind to one loop)"""
+        loop = asyncio.get_running_loop()
+        semaphore = self._llm_semaphores.get(loop)
+        if semaphore is None:
+            semaphore = self._llm_semaphores[loop] = asyncio.Semaphore(self.MAX_CONCURRENT_REQUESTS)
+        return semaphore
+    
     def chunk_document_recursive(self, content: str) -> List[Dict]:
         """
         Chunk document using recursive character-based splitting with semantic boundaries
-        Preserves paragraph and sentence structure
+        Preserves paragraph and sentence structure; each chunk also carries 'text_lower' for keyword scoring
         """
         separators = ["\n\n", "\n", ". ", " ", ""]
         chunks = []
         
         print(f"  📊 Chunking: {len(content):,} chars → ", end='')
         
-        def split_text(text: str, separators: List[str]) -> List[str]:
-            """Recursively split text using separators"""
-            if not separators:
-                return [text]
-            
-            separator = separators[0]
-            splits = text.split(separator)
-            
+        # Re-ingested documents reuse their chunks from the on-disk cache
+        cache_key = None
+        if self.response_cache is not None:
+            content_hash = hashlib.sha256(content.encode('utf-8')).hexdigest()
+            cache_key = f"chunks:{self.CACHE_VERSION}:{content_hash}:{self.chunk_size}:{self.chunk_overlap}"
+            cached = self.response_cache.get(cache_key)
+            if cached is not None:
+                print(f"{len(cached)} chunks (cached)")
+                return cached
+        
+        def split_text(text: str) -> List[str]:
+            """Split text on separators in order, re-splitting oversize pieces on the next one"""
             result = []
-            for split in splits:
-                if len(split) > self.chunk_size and len(separators) > 1:
-                    # Continue splitting with next separator
-                    result.extend(split_text(split, separators[1:]))
-                elif split:
-                    result.append(split)
+            # Depth-first work stack of (piece, separator level); level None marks a finished piece
+            stack = [(text, 0)]
+            while stack:
+                piece, level = stack.pop()
+                if level is None:
+                    result.append(piece)
+                    continue
+                
+                separator = separators[level]
+                if separator:
+                    splits = piece.split(separator)
+                else:
+                    # Last resort for a single oversize word: hard-split at chunk_size
+                    splits = [piece[i:i + self.chunk_size] for i in range(0, len(piece), self.chunk_size)]
+                
+                next_level = level + 1 if level + 1 < len(separators) else None
+                # Push in reverse so pieces are emitted in document order
+                for split in reversed(splits):
+                    if len(split) > self.chunk_size and next_level is not None:
+                        stack.append((split, next_level))
+                    elif split:
+                        stack.append((split, None))
             
             return result
         
         # Split content
-        text_splits = split_text(content, separators)
+        text_splits = split_text(content)
         
-        # Combine splits into chunks with overlap
-        current_chunk = ""
+        # Combine splits into chunks with overlap; parts are joined once per emitted chunk
+        current_parts = []
+        current_len = 0
         for i, split in enumerate(text_splits):
-            if len(current_chunk) + len(split) < self.chunk_size:
-                current_chunk += split + " "
+            if current_len + len(split) < self.chunk_size:
+                current_parts += (split, " ")
+                current_len += len(split) + 1
             else:
+                current_chunk = "".join(current_parts)
                 if current_chunk:
                     # Determine position (early/middle/late)
                     position_pct = i / len(text_splits)
@@ -122,8 +592,10 @@ class RAGEngine:
                     else:
                         position = "late"
                     
+                    text = current_chunk.strip()
                     chunks.append({
-                        'text': current_chunk.strip(),
+                        'text': text,
+                        'text_lower': text.lower(),
                         'chunk_id': len(chunks),
                         'char_count': len(current_chunk),
                         'position': position,
@@ -134,20 +606,28 @@ class RAGEngine:
                 if len(chunks) > 0 and self.chunk_overlap > 0:
                     # Take last N characters as overlap
                     overlap_text = current_chunk[-self.chunk_overlap:] if len(current_chunk) > self.chunk_overlap else current_chunk
-                    current_chunk = overlap_text + split + " "
+                    current_parts = [overlap_text, split, " "]
+                    current_len = len(overlap_text) + len(split) + 1
                 else:
-                    current_chunk = split + " "
+                    current_parts = [split, " "]
+                    current_len = len(split) + 1
         
         # Add last chunk
-        if current_chunk.strip():
+        current_chunk = "".join(current_parts)
+        text = current_chunk.strip()
+        if text:
             chunks.append({
-                'text': current_chunk.strip(),
+                'text': text,
+                'text_lower': text.lower(),
                 'chunk_id': len(chunks),
                 'char_count': len(current_chunk),
                 'position': 'late',
                 'position_pct': 1.0
             })
         
+        if cache_key is not None:
+            self.response_cache.set(cache_key, chunks, expire=self.CHUNK_CACHE_TTL)
+        
         print(f"{len(chunks)} chunks")
         return chunks
     
@@ -158,371 +638,463 @@ class RAGEngine:
         """
         print(f"  🎯 Re-ranking {len(chunks)} chunks by business impact...")
         
+        # Business keywords weight 2, technical keywords weight 1 (a keyword in both lists counts for both)
+        keyword_weights = {}
+        for keyword in self.business_keywords:
+            keyword_weights[keyword] = keyword_weights.get(keyword, 0) + 2
+        for keyword in self.technical_keywords:
+            keyword_weights[keyword] = keyword_weights.get(keyword, 0) + 1
+        keyword_weights = list(keyword_weights.items())
+        
         for chunk in chunks:
-            text_lower = chunk['text'].lower()
-            
-            # Score business keywords (weight = 2)
-            business_score = sum(2 for keyword in self.business_keywords if keyword in text_lower)
+            # Chunks from chunk_document_recursive carry a precomputed lowercase copy
+            text_lower = chunk.get('text_lower')
+            if text_lower is None:
+                text_lower = chunk['text'].lower()
             
-            # Score technical keywords (weight = 1)
-            technical_score = sum(1 for keyword in self.technical_keywords if keyword in text_lower)
-            
-            # Combined score
-            chunk['relevance_score'] = business_score + technical_score
-        
-        # Sort by relevance score (descending)
-        ranked_chunks = sorted(chunks, key=lambda x: x['relevance_score'], reverse=True)
+            # Combined score: one pass over the weighted keywords
+            chunk['relevance_score'] = sum(weight for keyword, weight in keyword_weights if keyword in text_lower)
         
-        # Return top K chunks
-        top_chunks = ranked_chunks[:top_k]
+        # Top K by relevance score (descending); ties keep document order, same as a stable reverse sort
+        top_chunks = heapq.nlargest(top_k, chunks, key=lambda x: x['relevance_score'])
         print(f"    Top chunk scores: {[c['relevance_score'] for c in top_chunks[:5]]}")
         
         return top_chunks
     
     def chunk_document(self, content: str) -> List[Dict]:
         """Chunk document into overlapping segments (legacy method for compatibility)"""
-        words = content.split()
-        total_words = len(words)
-        chunks = []
+        # Word offsets into content; each chunk is then a single slice of the original text
+        spans = [match.span() for match in _WORD_RE.finditer(content)]
+        total_words = len(spans)
         
         print(f"  📊 Chunking: {total_words:,} words → ", end='')
         
-        for i in range(0, total_words, self.chunk_size - self.chunk_overlap):
-            chunk_words = words[i:i + self.chunk_size]
-            chunk_text = ' '.join(chunk_words)
-            
-            chunks.append({
-                'text': chunk_text,
-                'start_word': i,
-                'end_word': i + len(chunk_words),
-                'chunk_id': len(chunks),
-                'word_count': len(chunk_words)
-            })
+        # All (start, end) word ranges up front, then one pass to build the chunks
+        starts = range(0, total_words, self.chunk_size - self.chunk_overlap)
+        ends = [min(start + self.chunk_size, total_words) for start in starts]
+        chunks = [
+            {
+                'text': content[spans[start][0]:spans[end - 1][1]],
+                'start_word': start,
+                'end_word': end,
+                'chunk_id': chunk_id,
+                'word_count': end - start
+            }
+            for chunk_id, (start, end) in enumerate(zip(starts, ends))
+        ]
         
         print(f"{len(chunks)} chunks")
         return chunks
     
     def extract_knowledge(self, content: str, metadata: Dict = None) -> ExtractedKnowledge:
-        """Extract structured knowledge using multi-pass extraction strategy"""
+        """Extract structured knowledge using multi-pass extraction strategy (blocking wrapper)"""
+        return _run_blocking(self.extract_knowledge_async(content, metadata))
+    
+    def extract_knowledge_batch(self, docs: List[str], poll_interval: int = 30) -> List[ExtractedKnowledge]:
+        """
+        Extract knowledge for many documents through the OpenAI Batch API
+        Half the token cost of live calls; results arrive within the 24h batch window
+        
+        The extraction passes run twice: once to collect every request, and once
+        to replay the batch output through the normal parsing code.
+        """
+        print(f"\n📦 Batch extraction: {len(docs)} documents")
+        self._batch_requests = {}
+        try:
+            _run_blocking(self._extract_all(docs))
+            requests = self._batch_requests
+        finally:
+            self._batch_requests = None
+        
+        self._batch_results = self._run_batch(requests, poll_interval) if requests else {}
+        try:
+            return _run_blocking(self._extract_all(docs))
+        finally:
+            self._batch_results = None
+    
+    async def extract_many(self, docs: List[str], concurrency: int = 16) -> AsyncIterator[Tuple[int, ExtractedKnowledge]]:
+        """
+        Extract knowledge from many documents concurrently, yielding (index, knowledge) as each finishes
+        At most `concurrency` documents are in flight; LLM calls are still capped by MAX_CONCURRENT_REQUESTS
+        
+        Can be driven from any event loop, including repeated asyncio.run calls on one engine:
+        the LLM semaphore and async client are per loop. Await aclose_clients() before a
+        short-lived loop exits to release its connections.
+        """
+        doc_semaphore = asyncio.Semaphore(concurrency)
+        
+        async def extract_one(index: int, doc: str) -> Tuple[int, ExtractedKnowledge]:
+            async with doc_semaphore:
+                return index, await self.extract_knowledge_async(doc)
+        
+        for next_done in asyncio.as_completed([extract_one(i, doc) for i, doc in enumerate(docs)]):
+            yield await next_done
+    
+    async def _extract_all(self, docs: List[str]) -> List[ExtractedKnowledge]:
+        """Run extract_knowledge_async over all documents concurrently"""
+        return list(await asyncio.gather(*(self.extract_knowledge_async(doc) for doc in docs)))
+    
+    def _run_batch(self, requests: Dict[str, Dict], poll_interval: int) -> Dict[str, str]:
+        """Submit requests (custom_id -> chat completion body) as one batch and return custom_id -> content"""
+        lines = []
+        for custom_id, request in requests.items():
+            lines.append(json.dumps({
+                'custom_id': custom_id,
+                'method': 'POST',
+                'url': '/v1/chat/completions',
+                'body': request
+            }))
+        
+        batch_file = self.client.files.create(
+            file=('rag_batch.jsonl', "\n".join(lines).encode('utf-8')),
+            purpose='batch'
+        )
+        batch = self.client.batches.create(
+            input_file_id=batch_file.id,
+            endpoint='/v1/chat/completions',
+            completion_window='24h'
+        )
+        print(f"  ⏳ Batch {batch.id}: {len(lines)} requests submitted")
+        
+        while batch.status not in ('completed', 'failed', 'expired', 'cancelled'):
+            time.sleep(poll_interval)
+            batch = self.client.batches.retrieve(batch.id)
+        
+        if batch.status != 'completed' or not batch.output_file_id:
+            print(f"  ⚠ Batch {batch.id} ended with status {batch.status}")
+            return {}
+        
+        results = {}
+        truncated = 0
+        for line in self.client.files.content(batch.output_file_id).text.splitlines():
+            if not line.strip():
+                continue
+            record = json.loads(line)
+            response = record.get('response') or {}
+            choices = (response.get('body') or {}).get('choices') or []
+            if response.get('status_code') == 200 and choices:
+                # Truncated responses are left out, so their passes count as failed and are retried live later
+                if choices[0].get('finish_reason') == 'length':
+                    truncated += 1
+                    continue
+                results[record['custom_id']] = (choices[0]['message'].get('content') or '').strip()
+        
+        print(f"  ✓ Batch {batch.id}: {len(results)}/{len(lines)} responses")
+        if truncated:
+            print(f"  ⚠ Batch {batch.id}: {truncated} responses hit max_tokens and were dropped")
+        return results
+    
+    async def extract_knowledge_async(self, content: str, metadata: Dict = None) -> ExtractedKnowledge:
+        """
+        Extract structured knowledge using multi-pass extraction strategy
+        Results are memoized per engine on the content hash; callers get their own copy
+        """
+        content_hash = hashlib.sha256(content.encode('utf-8')).hexdigest()
+        # Batch collection runs return placeholders and must neither hit nor fill the cache
+        use_cache = self._batch_requests is None
+        
+        if use_cache and content_hash in self._result_cache:
+            print(f"\n🧠 RAG Knowledge Extraction: reusing result for identical document")
+            return copy.deepcopy(self._result_cache[content_hash])
+        
+        knowledge, complete = await self._extract_knowledge_passes(content)
+        # Results with failed passes are not memoized, so the next call retries them
+        if use_cache and complete:
+            self._result_cache[content_hash] = copy.deepcopy(knowledge)
+        return knowledge
+    
+    async def _extract_knowledge_passes(self, content: str) -> Tuple[ExtractedKnowledge, bool]:
+        """
+        Run the extraction passes; all are independent, so their LLM calls are issued concurrently
+        Returns the knowledge and whether every pass succeeded (failed passes fall back to empty values)
+        """
         total_chars = len(content)
         total_words = len(content.split())
         
         print(f"\n🧠 RAG Knowledge Extraction (Multi-Pass Strategy)")
         print(f"  Document: {total_chars:,} chars, {total_words:,} words")
         
+        doc_metadata = {'total_words': total_words, 'total_chars': total_chars}
+        if total_words < self.SHORT_DOCUMENT_WORDS:
+            return await self._extract_short(content, doc_metadata)
+        
         # Chunk the document using recursive chunking
         chunks = self.chunk_document_recursive(content)
         
         # Re-rank chunks for business impact
         ranked_chunks = self.re_rank_chunks(chunks, top_k=10)
         
-        print(f"\n  🔍 Multi-Pass Extraction:")
+        # Bucket chunks by position once for the position-aware passes
+        by_position = {'early': [], 'middle': [], 'late': []}
+        for chunk in chunks:
+            by_position[chunk['position']].append(chunk)
         
-        # Pass 1: Strategic Executive Summary (early + late chunks, up to 8000 chars)
-        print(f"    • Pass 1: Strategic Executive Summary...", end='', flush=True)
-        executive_summary = self._extract_executive_summary(chunks, content[:8000])
-        print(f" ✓")
+        print(f"\n  🔍 Multi-Pass Extraction (concurrent):")
         
-        # Pass 2: Key Highlights (re-ranked chunks, up to 8000 chars)
-        print(f"    • Pass 2: Key Highlights (Re-ranked)...", end='', flush=True)
-        key_highlights = self._extract_key_highlights(ranked_chunks[:5], content[:8000])
-        print(f" ✓")
+        # (field, label, coroutine, default on failure)
+        passes = [
+            # Pass 1: Strategic Executive Summary (early + late chunks, up to 8000 chars)
+            ('executive_summary', "Pass 1: Strategic Executive Summary",
+             self._extract_executive_summary(by_position, content[:8000]), ""),
+            # Pass 2: Key Highlights (re-ranked chunks, up to 8000 chars)
+            ('key_highlights', "Pass 2: Key Highlights (Re-ranked)",
+             self._extract_key_highlights(ranked_chunks[:5], content[:8000]), []),
+            # Pass 3: Feature Articles (middle chunks, up to 10000 chars)
+            ('feature_articles', "Pass 3: Feature Articles (Deep-dive)",
+             self._extract_feature_articles(chunks, by_position, content[:10000]), []),
+            # Pass 4: Supporting Content (first 4-6 chunks, one bundled call)
+            ('supporting_content', "Pass 4: Supporting Content",
+             self._extract_supporting_content(chunks[:6], content[:6000],
+                                              include_technical=bool(_TECHNICAL_HINTS_RE.search(content))), {}),
+            # Pass 5: Strategic Insights
+            ('strategic_insights', "Pass 5: Strategic Insights",
+             self._extract_strategic_insights(content[:8000]), {}),
+        ]
         
-        # Pass 3: Feature Articles (middle chunks, up to 10000 chars)
-        print(f"    • Pass 3: Feature Articles (Deep-dive)...", end='', flush=True)
-        feature_articles = self._extract_feature_articles(chunks, content[:10000])
-        print(f" ✓")
+        results = await asyncio.gather(*(coro for _, _, coro, _ in passes), return_exceptions=True)
         
-        # Pass 4: Supporting Content (first 4-6 chunks)
-        print(f"    • Pass 4: Supporting Content...", end='', flush=True)
-        quick_bites = self._extract_quick_bites(chunks[:6], content[:6000])
-        action_items = self._extract_action_items(chunks[:6], content[:6000])
-        technologies = self._extract_technologies(chunks[:6], content[:6000])
-        architectures = self._extract_architectures(chunks[:6], content[:6000])
-        best_practices = self._extract_best_practices(chunks[:6], content[:6000])
-        diagrams = self._extract_diagrams(chunks[:6], content[:6000])
-        print(f" ✓")
+        extracted = {}
+        complete = True
+        for (name, label, _, default), result in zip(passes, results):
+            if isinstance(result, ExtractionError):
+                print(f"    • {label}... ⚠ {result}")
+                result = default
+                complete = False
+            elif isinstance(result, BaseException):
+                raise result
+            else:
+                print(f"    • {label}... ✓")
+            extracted[name] = result
         
-        # Pass 5: Strategic Insights (NEW)
-        print(f"    • Pass 5: Strategic Insights...", end='', flush=True)
-        strategic_insights = self._extract_strategic_insights(content[:8000])
-        print(f" ✓")
+        # Pass 4 returns several fields at once
+        supporting = extracted.pop('supporting_content')
+        for key, section_type, _ in self.SUPPORTING_SECTIONS:
+            extracted[key] = supporting.get(key, section_type())
         
         # Build ExtractedKnowledge object
-        knowledge = ExtractedKnowledge(
-            executive_summary=executive_summary,
-            key_highlights=key_highlights,
-            feature_articles=feature_articles,
-            quick_bites=quick_bites,
-            action_items=action_items,
-            technologies=technologies,
-            architectures=architectures,
-            best_practices=best_practices,
-            diagram_suggestions=diagrams,
-            metadata={'total_words': total_words, 'total_chars': total_chars},
-            strategic_insights=strategic_insights
-        )
+        knowledge = ExtractedKnowledge(**extracted, metadata=doc_metadata)
         
-        return knowledge
+        return knowledge, complete
+    
+    async def _extract_short(self, content: str, doc_metadata: Dict) -> Tuple[ExtractedKnowledge, bool]:
+        """
+        Single-call extraction for short documents (news snippets, announcements)
+        Only the summary, highlights and quick bites are requested; the remaining sections rarely apply
+        Returns the knowledge and whether the call succeeded
+        """
+        print(f"\n  ⚡ Short document: single-pass extraction...", end='', flush=True)
+        
+        prompt = self._PROMPT_TEMPLATES['short_document'].format(content=self._fit_context(content, 2000))
+        
+        try:
+            data = await self._extract_with_llm_v2(
+                'short_document', prompt, max_tokens=1000, temperature=0.2,
+                response_format={"type": "json_object"}, json_type=dict
+            )
+        except ExtractionError as e:
+            print(f" ⚠ {e}")
+            return ExtractedKnowledge(metadata=doc_metadata), False
+        print(f" ✓")
+        
+        summary = data.get('executive_summary')
+        highlights = data.get('key_highlights')
+        quick_bites = data.get('quick_bites')
+        return ExtractedKnowledge(
+            executive_summary=summary if isinstance(summary, str) else "",
+            key_highlights=highlights if isinstance(highlights, list) else [],
+            quick_bites=quick_bites if isinstance(quick_bites, list) else [],
+            metadata=doc_metadata
+        ), True
     
-    def _extract_executive_summary(self, chunks: List[Dict], context: str) -> str:
+    async def _extract_executive_summary(self, by_position: Dict[str, List[Dict]], context: str) -> str:
         """Pass 1: Strategic Executive Summary with business impact framing"""
         # Use early + late chunks for context
-        early_chunks = [c for c in chunks if c['position'] == 'early'][:2]
-        late_chunks = [c for c in chunks if c['position'] == 'late'][:2]
-        combined_chunks = early_chunks + late_chunks
+        combined_chunks = by_position['early'][:2] + by_position['late'][:2]
         
-        chunk_text = "\n\n".join([c['text'] for c in combined_chunks])
-        context_text = chunk_text[:8000] if len(chunk_text) > 8000 else chunk_text
+        context_text = self._fit_chunks(combined_chunks, 2000)
         
-        prompt = f"""Based on the following content, provide a strategic executive summary (2-3 paragraphs) that leads with business impact framing.
-
-REQUIREMENTS:
-- Lead with Business Impact: Why does this matter to the business?
-- Risk Factors: What risks or challenges are highlighted?
-- Strategic Opportunities: What opportunities for growth or competitive advantage?
-- Use assertive, analytical language (NOT passive or speculative)
-- Include specific data points and concrete examples
-- Executive-grade prose with authority
-
-Content:
-{context_text}
-
-Strategic Executive Summary:"""
+        prompt = self._PROMPT_TEMPLATES['executive_summary'].format(context_text=context_text)
         
-        return self._extract_with_llm_v2('executive_summary', prompt, max_tokens=800, temperature=0.5)
+        return await self._extract_with_llm_v2('executive_summary', prompt, max_tokens=600, temperature=0.5)
     
-    def _extract_key_highlights(self, ranked_chunks: List[Dict], context: str) -> List[Dict]:
+    async def _extract_key_highlights(self, ranked_chunks: List[Dict], context: str) -> List[Dict]:
         """Pass 2: Key Highlights with re-ranked chunks"""
-        chunk_text = "\n\n".join([c['text'] for c in ranked_chunks])
-        context_text = chunk_text[:8000] if len(chunk_text) > 8000 else chunk_text
+        context_text = self._fit_chunks(ranked_chunks, 2000)
         
-        prompt = f"""Based on the following high-impact content, extract 5-7 key highlights.
-
-For each highlight, provide:
-- title: Assertive, impactful title (7-10 words) - NO vague generalities
-- description: Specific description (2-3 sentences) with concrete examples and data points
-- category: One of "Business Impact" | "Risk Factor" | "Strategic Opportunity"
-
-AVOID:
-- Vague generalities
-- Passive voice
-- Speculative language (might, could, possibly, maybe)
-
-Return as JSON array of objects with "title", "description", and "category" keys.
-
-Content:
-{context_text}
-
-Key Highlights (JSON):"""
+        prompt = self._PROMPT_TEMPLATES['key_highlights'].format(context_text=context_text)
         
-        result = self._extract_with_llm_v2('key_highlights', prompt, max_tokens=1500, temperature=0.4)
-        return self._parse_json_safe(result, [])
+        return await self._extract_with_llm_v2('key_highlights', prompt, max_tokens=1200, temperature=0.2,
+                                               json_type=list)
     
-    def _extract_feature_articles(self, chunks: List[Dict], context: str) -> List[Dict]:
+    async def _extract_feature_articles(self, chunks: List[Dict], by_position: Dict[str, List[Dict]],
+                                        context: str) -> List[Dict]:
         """Pass 3: Feature Articles with deep-dive focus"""
         # Focus on middle chunks for technical depth
-        middle_chunks = [c for c in chunks if c['position'] == 'middle'][:4]
+        middle_chunks = by_position['middle'][:4]
         if len(middle_chunks) < 2:
             middle_chunks = chunks[:4]
         
-        chunk_text = "\n\n".join([c['text'] for c in middle_chunks])
-        context_text = chunk_text[:10000] if len(chunk_text) > 10000 else chunk_text
+        context_text = self._fit_chunks(middle_chunks, 2500)
         
-        prompt = f"""Based on the following content, identify 2-4 major topics for deep-dive feature articles.
-
-For each article, provide:
-- title: Clear, descriptive title
-- context: Problem statement or background with concrete examples
-- key_ideas: Detailed technical concepts (extract specific examples, NOT generic descriptions)
-- benefits: Quantified benefits when possible
-- best_practices: Actionable best practices (specific, not generic)
-- call_to_action: Specific next step with timeline
-
-REQUIREMENTS:
-- Extract specific examples and details from content
-- Each article must have UNIQUE insights (no repetition across articles)
-- Use assertive, analytical language
-- Avoid vague generalities
-
-Return as JSON array of objects.
-
-Content:
-{context_text}
-
-Feature Articles (JSON):"""
+        prompt = self._PROMPT_TEMPLATES['feature_articles'].format(context_text=context_text)
         
-        result = self._extract_with_llm_v2('feature_articles', prompt, max_tokens=2500, temperature=0.4)
-        return self._parse_json_safe(result, [])
+        return await self._extract_with_llm_v2('feature_articles', prompt, max_tokens=2000, temperature=0.2,
+                                               json_type=list)
     
-    def _extract_quick_bites(self, chunks: List[Dict], context: str) -> List[str]:
-        """Pass 4: Quick Bites"""
-        chunk_text = "\n\n".join([c['text'] for c in chunks])
-        context_text = chunk_text[:6000] if len(chunk_text) > 6000 else chunk_text
-        
-        prompt = f"""Based on the following content, list 3-5 short updates, tips, or minor announcements (1-2 sentences each).
-
-Use assertive language and be specific.
-
-Content:
-{context_text}
-
-Quick Bites:"""
+    async def _extract_supporting_content(self, chunks: List[Dict], context: str, include_technical: bool = True) -> Dict:
+        """
+        Pass 4: Quick bites, action items, technologies, architectures, best practices and diagrams in one call
+        Architectures and diagrams are left empty (not requested) when include_technical is False
+        """
+        context_text = self._fit_chunks(chunks, 1500)
         
-        result = self._extract_with_llm_v2('quick_bites', prompt, max_tokens=800, temperature=0.4)
-        return self._parse_list(result)
-    
-    def _extract_action_items(self, chunks: List[Dict], context: str) -> Dict:
-        """Pass 4: Action Items"""
-        chunk_text = "\n\n".join([c['text'] for c in chunks])
-        context_text = chunk_text[:6000] if len(chunk_text) > 6000 else chunk_text
+        requested = [
+            section for section in self.SUPPORTING_SECTIONS
+            if include_technical or section[0] not in self.TECHNICAL_SECTIONS
+        ]
+        sections = "\n".join(f"- {key}: {instructions}" for key, _, instructions in requested)
+        prompt = self._PROMPT_TEMPLATES['supporting_content'].format(sections=sections, context_text=context_text)
         
-        prompt = f"""Based on the following content, identify concrete action items for:
-- engineering_teams: Specific actions for developers and engineers
-- architecture_teams: Specific actions for architects and strategy teams
-- leadership: Specific actions for decision makers and leadership
-
-Return as JSON object with these three keys, each containing an array of action items.
-
-Content:
-{context_text}
-
-Action Items (JSON):"""
+        data = await self._extract_with_llm_v2(
+            'supporting_content', prompt, max_tokens=4500, temperature=0.0,
+            response_format={"type": "json_object"}, json_type=dict
+        )
         
-        result = self._extract_with_llm_v2('action_items', prompt, max_tokens=1000, temperature=0.4)
-        return self._parse_json_safe(result, {})
+        # Keep only requested, well-typed sections; a list returned as plain text falls back to line splitting
+        supporting = {key: section_type() for key, section_type, _ in self.SUPPORTING_SECTIONS}
+        for key, section_type, _ in requested:
+            value = data.get(key)
+            if section_type is list and isinstance(value, str):
+                value = self._parse_list(value)
+            supporting[key] = value if isinstance(value, section_type) else section_type()
+        return supporting
     
-    def _extract_technologies(self, chunks: List[Dict], context: str) -> List[str]:
-        """Pass 4: Technologies"""
-        chunk_text = "\n\n".join([c['text'] for c in chunks])
-        context_text = chunk_text[:6000] if len(chunk_text) > 6000 else chunk_text
-        
-        prompt = f"""Based on the following content, list all technologies, tools, platforms, and services mentioned.
-
-Return as JSON array of strings.
-
-Content:
-{context_text}
-
-Technologies (JSON):"""
+    async def _extract_strategic_insights(self, context: str) -> Dict:
+        """Pass 5: Strategic Insights (NEW)"""
+        prompt = self._PROMPT_TEMPLATES['strategic_insights'].format(context_text=self._fit_context(context, 2000))
         
-        result = self._extract_with_llm_v2('technologies', prompt, max_tokens=500, temperature=0.3)
-        return self._parse_json_safe(result, [])
+        return await self._extract_with_llm_v2('strategic_insights', prompt, max_tokens=600, temperature=0.2,
+                                               json_type=dict)
     
-    def _extract_architectures(self, chunks: List[Dict], context: str) -> List[Dict]:
-        """Pass 4: Architectures"""
-        chunk_text = "\n\n".join([c['text'] for c in chunks])
-        context_text = chunk_text[:6000] if len(chunk_text) > 6000 else chunk_text
+    async def _extract_with_llm_v2(self, category: str, prompt: str, max_tokens: int = 2000, temperature: float = 0.4,
+                                   response_format: Optional[Dict] = None, model: Optional[str] = None,
+                                   json_type: Optional[type] = None):
+        """
+        Extract using LLM with enhanced system prompt and configurable parameters
+        With json_type (list or dict) the reply is parsed and the value returned instead of the text;
+        replies are cached only once they parse.
+        Raises ExtractionError when the call fails or the reply does not parse, so callers can tell a
+        failure from an empty answer
+        """
+        if not self.llm_available:
+            return json_type() if json_type else ""
         
-        prompt = f"""Based on the following content, identify key architectures or design patterns. For each, provide:
-- name: Architecture or pattern name
-- description: Brief description
-- components: Key components or services
-- use_case: When to use this
-
-Return as JSON array of objects.
-
-Content:
-{context_text}
-
-Architectures (JSON):"""
+        request = {
+            'model': model or self.model,
+            'messages': [
+                {"role": "system", "content": self._SYSTEM_PROMPT},
+                {"role": "user", "content": prompt}
+            ],
+            'temperature': temperature,
+            'max_tokens': max_tokens,
+            'stop': self.STOP_SEQUENCES,
+        }
+        if response_format:
+            request['response_format'] = response_format
         
-        result = self._extract_with_llm_v2('architectures', prompt, max_tokens=1200, temperature=0.4)
-        return self._parse_json_safe(result, [])
-    
-    def _extract_best_practices(self, chunks: List[Dict], context: str) -> List[str]:
-        """Pass 4: Best Practices"""
-        chunk_text = "\n\n".join([c['text'] for c in chunks])
-        context_text = chunk_text[:6000] if len(chunk_text) > 6000 else chunk_text
+        cache_key = self._cache_key(request)
+        if self.response_cache is not None:
+            cached = self.response_cache.get(cache_key)
+            if cached is not None:
+                return self._parse_reply(category, cached, json_type)
         
-        prompt = f"""Based on the following content, list 4-6 best practices or recommendations mentioned.
-
-Be specific and actionable.
-
-Content:
-{context_text}
-
-Best Practices:"""
+        # Batch mode: the request hash doubles as the batch custom_id
+        if self._batch_requests is not None:
+            self._batch_requests[cache_key] = request
+            return json_type() if json_type else ""
+        if self._batch_results is not None:
+            result = self._batch_results.get(cache_key)
+            if result is None:
+                raise ExtractionError(f"{category}: no result in the batch output")
+            value = self._parse_reply(category, result, json_type)
+            if self.response_cache is not None and result:
+                self.response_cache.set(cache_key, result)
+            return value
         
-        result = self._extract_with_llm_v2('best_practices', prompt, max_tokens=800, temperature=0.4)
-        return self._parse_list(result)
-    
-    def _extract_diagrams(self, chunks: List[Dict], context: str) -> List[Dict]:
-        """Pass 4: Diagram Suggestions"""
-        chunk_text = "\n\n".join([c['text'] for c in chunks])
-        context_text = chunk_text[:6000] if len(chunk_text) > 6000 else chunk_text
+        choice = (await self._create_completion(category, request)).choices[0]
+        if choice.finish_reason == 'length':
+            # Truncated output is usually unparseable JSON: retry once with twice the budget
+            print(f"\n    ⚠ {category}: response hit max_tokens={max_tokens}, retrying with {2 * max_tokens}")
+            choice = (await self._create_completion(category, {**request, 'max_tokens': 2 * max_tokens})).choices[0]
         
-        prompt = f"""Based on the following content, suggest 3-4 technical diagrams that would help explain the content. For each:
-- type: "architecture" | "workflow" | "integration" | "security"
-- title: Diagram title
-- purpose: What it explains and who it's for
-- elements: List of key components/nodes
-- description: How to recreate it
-
-Return as JSON array of objects.
-
-Content:
-{context_text}
-
-Diagrams (JSON):"""
+        if choice.finish_reason == 'length':
+            # Not cached, and the pass counts as failed so its result is not memoized
+            raise ExtractionError(f"{category}: response still truncated at max_tokens={2 * max_tokens}")
         
-        result = self._extract_with_llm_v2('diagrams', prompt, max_tokens=1200, temperature=0.4)
-        return self._parse_json_safe(result, [])
+        result = (choice.message.content or "").strip()
+        value = self._parse_reply(category, result, json_type)
+        if self.response_cache is not None and result:
+            self.response_cache.set(cache_key, result)
+        return value
     
-    def _extract_strategic_insights(self, context: str) -> Dict:
-        """Pass 5: Strategic Insights (NEW)"""
-        prompt = f"""Analyze the following content for strategic framing. Extract:
-- business_impact: How this impacts business outcomes (revenue, cost, efficiency)
-- risk_factors: Key risks and challenges identified
-- strategic_opportunities: Opportunities for growth or competitive advantage
-- key_metrics: Any KPIs or metrics mentioned
-
-Return as JSON object with these four keys.
-
-Content:
-{context[:8000]}
-
-Strategic Insights (JSON):"""
-        
-        result = self._extract_with_llm_v2('strategic_insights', prompt, max_tokens=800, temperature=0.4)
-        return self._parse_json_safe(result, {})
+    def _parse_reply(self, category: str, text: str, json_type: Optional[type]):
+        """Reply text, or its parsed JSON value when json_type is given (ExtractionError if it does not parse)"""
+        if json_type is None:
+            return text
+        try:
+            return self._parse_json(text, json_type)
+        except ValueError as e:
+            raise ExtractionError(f"{category}: unparseable reply: {e}") from e
     
-    def _extract_with_llm_v2(self, category: str, prompt: str, max_tokens: int = 2000, temperature: float = 0.4) -> str:
-        """Extract using LLM with enhanced system prompt and configurable parameters"""
-        if not self.llm_available:
-            return ""
-        
-        system_prompt = """You are a senior executive technology analyst and strategic content writer.
-
-WRITING STYLE:
-- Assertive and analytical (not passive or speculative)
-- Lead with impact and "so what?"
-- Use specific data points and concrete examples
-- Executive-grade prose with authority
-
-AVOID:
-- Speculative language (might, could, possibly, maybe)
-- Vague generalities
-- Repetitive content
-- Safe/passive voice"""
+    async def _create_completion(self, category: str, request: Dict):
+        """Issue one chat completion, retrying transient errors with backoff (ExtractionError on failure)"""
+        for attempt in range(self.MAX_RETRIES):
+            try:
+                async with self._get_llm_semaphore():
+                    return await self.aclient.chat.completions.create(**request)
+            except _RETRYABLE_ERRORS as e:
+                if attempt == self.MAX_RETRIES - 1:
+                    raise ExtractionError(f"{category} failed after {self.MAX_RETRIES} attempts: {e}") from e
+                # Exponential backoff with jitter, outside the semaphore so other passes proceed
+                await asyncio.sleep(2 ** attempt + random.random())
+            except _API_ERRORS as e:
+                # Not retryable (auth, bad request, ...); other exceptions are bugs and propagate
+                raise ExtractionError(f"{category}: {e}") from e
+    
+    def _fit_chunks(self, chunks: List[Dict], max_tokens: int) -> str:
+        """Join chunk texts within a token budget without building text the budget would cut off"""
+        texts = (c['text'] for c in chunks)
+        if not TIKTOKEN_AVAILABLE:
+            return self._cap_join(texts, max_tokens * self.CHARS_PER_TOKEN)
+        return self._fit_context("\n\n".join(texts), max_tokens)
+    
+    @staticmethod
+    def _cap_join(texts: Iterable[str], cap: int, sep: str = "\n\n") -> str:
+        """Equivalent to sep.join(texts)[:cap], but stops consuming texts once cap is reached"""
+        pieces = []
+        remaining = cap
+        for text in texts:
+            piece = sep + text if pieces else text
+            if len(piece) >= remaining:
+                pieces.append(piece[:remaining])
+                break
+            pieces.append(piece)
+            remaining -= len(piece)
+        return "".join(pieces)
+    
+    def _fit_context(self, text: str, max_tokens: int) -> str:
+        """Truncate text to a token budget (exact with tiktoken, CHARS_PER_TOKEN estimate otherwise)"""
+        if not TIKTOKEN_AVAILABLE:
+            return text[:max_tokens * self.CHARS_PER_TOKEN]
         
-        try:
-            response = self.client.chat.completions.create(
-                model="gpt-4o-mini",
-                messages=[
-                    {"role": "system", "content": system_prompt},
-                    {"role": "user", "content": prompt}
-                ],
-                temperature=temperature,
-                max_tokens=max_tokens,
-                timeout=60
-            )
-            
-            return response.choices[0].message.content.strip()
-            
-        except Exception as e:
-            print(f"\n    Error in {category}: {e}")
-            return ""
+        encoding = _get_encoding(self.model)
+        tokens = encoding.encode(text)
+        return text if len(tokens) <= max_tokens else encoding.decode(tokens[:max_tokens])
+    
+    def _cache_key(self, request: Dict) -> str:
+        """Hash everything that shapes the completion (model, messages, sampling) plus the cache version"""
+        payload = dict(request, cache_version=self.CACHE_VERSION)
+        return hashlib.sha256(json.dumps(payload, sort_keys=True).encode('utf-8')).hexdigest()
     
     def _extract_with_llm(self, category: str, prompt: str) -> str:
         """Extract using LLM (legacy method for compatibility)"""
@@ -531,7 +1103,7 @@ AVOID:
         
         try:
             response = self.client.chat.completions.create(
-                model="gpt-4o-mini",
+                model=self.model,
                 messages=[
                     {
                         "role": "system",
@@ -550,43 +1122,51 @@ AVOID:
             print(f"\n    Error in {category}: {e}")
             return ""
     
-    def _parse_json_safe(self, text: str, default):
-        """Safely parse JSON from LLM response with enhanced handling"""
+    def _parse_json(self, text: str, expected_type: Optional[type] = None):
+        """Parse JSON (of expected_type if given) from an LLM response; ValueError when none is found"""
         if isinstance(text, (list, dict)):
-            return text
+            if expected_type is None or isinstance(text, expected_type):
+                return text
+            raise ValueError(f"expected a JSON {expected_type.__name__}, got {type(text).__name__}")
         
         if not text or not isinstance(text, str):
-            return default
+            raise ValueError("empty response")
         
+        # Fast path: the response (or its ```json fence) is exactly one JSON value of the expected type
+        json_match = _JSON_BLOCK_RE.search(text)
+        candidate = json_match.group(1) if json_match else text.strip()
+        
+        # JSONDecodeError (json and orjson) is a ValueError
         try:
-            # Try to extract JSON from markdown code blocks
-            json_match = re.search(r'```json\s*\n(.*?)\n```', text, re.DOTALL)
-            if json_match:
-                text = json_match.group(1)
-            else:
-                # Try to find JSON array or object
-                json_match = re.search(r'(\[[\s\S]*\]|\{[\s\S]*\})', text)
-                if json_match:
-                    text = json_match.group(1)
-            
-            return json.loads(text)
-        except json.JSONDecodeError as e:
-            print(f"\n    ⚠ JSON parse error: {e}")
-            return default
-        except Exception as e:
-            print(f"\n    ⚠ Unexpected error in JSON parsing: {e}")
-            return default
+            value = _loads_json(candidate)
+            if expected_type is None or isinstance(value, expected_type):
+                return value
+            error = f"expected a JSON {expected_type.__name__}, got {type(value).__name__}"
+        except ValueError as e:
+            error = e
+        
+        # Repair the bracketed span first: this also closes a response truncated mid-value
+        try:
+            value = _loads_json(_repair_json(_json_span(candidate)))
+            if expected_type is None or isinstance(value, expected_type):
+                return value
+        except ValueError:
+            pass
+        
+        # JSON embedded in prose: decode forward from each top-level opening bracket, no regex backtracking
+        value = _scan_json(candidate, expected_type)
+        if value is not None:
+            return value
+        
+        raise ValueError(str(error))
     
     def _parse_list(self, text: str) -> List[str]:
-        """Parse list from text"""
+        """Parse list from bulleted/numbered text (fallback when a JSON array comes back as a string)"""
         if isinstance(text, list):
             return text
         
-        # Split by newlines and clean
-        items = [line.strip() for line in text.split('\n') if line.strip()]
-        # Remove bullet points and numbering
-        items = [re.sub(r'^[\d\-\*\•]+[\.\)]\s*', '', item) for item in items]
-        return [item for item in items if item]
+        # Split lines, strip them and remove bullet points/numbering in a single regex pass
+        return [item for item in _LIST_ITEM_RE.findall(text) if item]
 
 
 if __name__ == "__main__":